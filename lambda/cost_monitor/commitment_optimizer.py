@@ -0,0 +1,123 @@
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+
+# Environment variables
+SAVINGS_PLAN_DISCOUNT = float(os.environ.get('SAVINGS_PLAN_DISCOUNT', '0.28'))
+COMMITMENT_LOOKBACK_DAYS = min(int(os.environ.get('COMMITMENT_LOOKBACK_DAYS', '14')), 14)
+COMMITMENT_CANDIDATES = int(os.environ.get('COMMITMENT_CANDIDATES', '4000'))
+# Most recent hours left out because Cost Explorer is still filling them in
+COMMITMENT_DATA_LAG_HOURS = int(os.environ.get('COMMITMENT_DATA_LAG_HOURS', '24'))
+
+HOURS_PER_MONTH = 730
+
+# Services covered by Compute Savings Plans
+ELIGIBLE_SERVICES = [
+    'Amazon Elastic Compute Cloud - Compute',
+    'AWS Lambda',
+    'Amazon Elastic Container Service'
+]
+
+
+def get_hourly_eligible_spend(ce_client, end_time: datetime, days: int = COMMITMENT_LOOKBACK_DAYS,
+                              lag_hours: int = COMMITMENT_DATA_LAG_HOURS) -> np.ndarray:
+    """
+    Get hourly on-demand spend eligible for commitments using Cost Explorer.
+    Cost Explorer only keeps hourly data for the last 14 days and it has to
+    be enabled in the billing preferences.
+
+    The trailing lag_hours are left out because their usage is still
+    arriving. Cost Explorer flags every result of the open billing month as
+    Estimated, so that flag can't be used to find them. The result covers
+    just the span Cost Explorer returned data for, so hours from before
+    hourly data was enabled don't count as zero usage.
+    """
+    now = end_time.replace(minute=0, second=0, microsecond=0)
+    start_time = now - timedelta(days=days)
+    end_time = now - timedelta(hours=lag_hours)
+    if end_time <= start_time:
+        raise ValueError(f"Lookback of {days} days doesn't extend past the {lag_hours} hour data lag")
+    hours = int((end_time - start_time).total_seconds() // 3600)
+    spend_by_hour: Dict[int, float] = {}
+
+    request = {
+        'TimePeriod': {
+            'Start': start_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'End': end_time.strftime('%Y-%m-%dT%H:%M:%SZ')
+        },
+        'Granularity': 'HOURLY',
+        'Metrics': ['UnblendedCost'],
+        'Filter': {
+            'And': [
+                {'Dimensions': {'Key': 'SERVICE', 'Values': ELIGIBLE_SERVICES}},
+                {'Dimensions': {'Key': 'PURCHASE_TYPE', 'Values': ['On Demand Instances']}}
+            ]
+        }
+    }
+
+    while True:
+        response = ce_client.get_cost_and_usage(**request)
+
+        for result in response['ResultsByTime']:
+            hour_start = datetime.strptime(result['TimePeriod']['Start'], '%Y-%m-%dT%H:%M:%SZ')
+            index = int((hour_start - start_time).total_seconds() // 3600)
+            if 0 <= index < hours:
+                amount = float(result['Total']['UnblendedCost']['Amount'])
+                spend_by_hour[index] = spend_by_hour.get(index, 0.0) + amount
+
+        if not response.get('NextPageToken'):
+            break
+        request['NextPageToken'] = response['NextPageToken']
+
+    if not spend_by_hour:
+        return np.zeros(0, dtype=np.float64)
+
+    first = min(spend_by_hour)
+    hourly_spend = np.zeros(max(spend_by_hour) - first + 1, dtype=np.float64)
+    for index, amount in spend_by_hour.items():
+        hourly_spend[index - first] = amount
+
+    return hourly_spend
+
+
+def optimize_commitment(hourly_spend, discount: float = SAVINGS_PLAN_DISCOUNT,
+                        candidates: int = COMMITMENT_CANDIDATES) -> Optional[Dict]:
+    """
+    Find the hourly commitment that maximizes savings against a usage curve.
+
+    A commitment of C dollars per hour is billed every hour and covers up to
+    C / (1 - discount) of on-demand spend; anything above that is billed at
+    on-demand rates. All candidate commitments are evaluated at once as a
+    (candidates x hours) broadcast.
+    """
+    if not 0 <= discount < 1:
+        raise ValueError(f"Savings Plans discount must be in [0, 1), got {discount}")
+
+    usage = np.asarray(hourly_spend, dtype=np.float64)
+    on_demand_spend = float(usage.sum())
+
+    if usage.size == 0 or on_demand_spend <= 0:
+        return None
+
+    commitments = np.linspace(0.0, usage.max() * (1 - discount), candidates)
+    capacity = commitments / (1 - discount)
+
+    covered = np.minimum(usage[np.newaxis, :], capacity[:, np.newaxis]).sum(axis=1)
+    cost = commitments * usage.size + (on_demand_spend - covered)
+    savings = on_demand_spend - cost
+
+    best = int(np.argmax(savings))
+    best_capacity = capacity[best] * usage.size
+
+    return {
+        'hourly_commitment': round(float(commitments[best]), 4),
+        'hours_analyzed': int(usage.size),
+        'discount_rate': discount,
+        'on_demand_spend': round(on_demand_spend, 2),
+        'estimated_savings': round(float(savings[best]), 2),
+        'estimated_monthly_savings': round(float(savings[best]) / usage.size * HOURS_PER_MONTH, 2),
+        'utilization': round(float(covered[best] / best_capacity), 4) if best_capacity > 0 else 0.0,
+        'coverage': round(float(covered[best]) / on_demand_spend, 4)
+    }
@@ -4,12 +4,19 @@ import boto3
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+from commitment_optimizer import get_hourly_eligible_spend, optimize_commitment
+from cost_store import download_cost_store
+from instrumentation import Instrumentation
+
 # Initialize AWS clients
 ce_client = boto3.client('ce', region_name='us-east-1')
 s3_client = boto3.client('s3')
 sns_client = boto3.client('sns')
 secrets_client = boto3.client('secretsmanager')
 
+instrumentation = Instrumentation('cost_monitor')
+instrumentation.instrument_clients(ce_client, s3_client, sns_client, secrets_client)
+
 # Environment variables
 DAILY_THRESHOLD = float(os.environ['DAILY_COST_THRESHOLD'])
 WEEKLY_THRESHOLD = float(os.environ['WEEKLY_COST_THRESHOLD'])
@@ -27,6 +34,7 @@ class DecimalEncoder(json.JSONEncoder):
         return super(DecimalEncoder, self).default(obj)
 
 
+@instrumentation.handler
 def lambda_handler(event, context):
     """
     Main Lambda handler for cost monitoring
@@ -51,6 +59,13 @@ def lambda_handler(event, context):
         # Get top 5 services
         top_services = sorted(service_costs.items(), key=lambda x: x[1], reverse=True)[:5]
         
+        # Get Savings Plans commitment recommendation
+        commitment = get_commitment_recommendation()
+        
+        # Get most expensive resources from the CUR cost store; the month of
+        # the reported day, so the 1st still shows the month that just ended
+        top_resources = get_top_resources(daily_start)
+        
         # Create cost report
         report = {
             'timestamp': str(datetime.now()),
@@ -60,7 +75,9 @@ def lambda_handler(event, context):
             'daily_threshold': DAILY_THRESHOLD,
             'weekly_threshold': WEEKLY_THRESHOLD,
             'top_services': dict(top_services),
-            'all_service_costs': service_costs
+            'all_service_costs': service_costs,
+            'commitment_recommendation': commitment,
+            'top_resources': top_resources
         }
         
         # Save report to S3
@@ -103,6 +120,7 @@ def lambda_handler(event, context):
         raise
 
 
+@instrumentation.traced()
 def get_daily_cost(start_date, end_date):
     """
     Get daily AWS costs using Cost Explorer API
@@ -130,6 +148,7 @@ def get_daily_cost(start_date, end_date):
         raise
 
 
+@instrumentation.traced()
 def get_weekly_cost(start_date, end_date):
     """
     Get weekly AWS costs using Cost Explorer API
@@ -157,6 +176,7 @@ def get_weekly_cost(start_date, end_date):
         raise
 
 
+@instrumentation.traced()
 def get_cost_by_service(start_date, end_date):
     """
     Get cost breakdown by AWS service
@@ -194,6 +214,65 @@ def get_cost_by_service(start_date, end_date):
         raise
 
 
+@instrumentation.traced()
+def get_commitment_recommendation():
+    """
+    Recommend an hourly Savings Plans commitment from recent hourly usage
+    """
+    try:
+        hourly_spend = get_hourly_eligible_spend(ce_client, datetime.utcnow())
+        
+        with instrumentation.phase('optimize_commitment'):
+            recommendation = optimize_commitment(hourly_spend)
+        
+        if recommendation:
+            print(f"Recommended commitment: ${recommendation['hourly_commitment']:.2f}/hour "
+                  f"(Savings: ${recommendation['estimated_monthly_savings']:.2f}/month)")
+        
+        return recommendation
+        
+    except Exception as e:
+        print(f"Error calculating commitment recommendation: {str(e)}")
+        return None
+
+
+@instrumentation.traced()
+def get_top_resources(date, limit=10):
+    """
+    Get the most expensive resources this month from the CUR cost store
+    """
+    try:
+        store = download_cost_store(s3_client, S3_BUCKET, f"{date.year}-{date.month:02d}")
+        if store is None:
+            return []
+        
+        try:
+            return store.top_resources(limit)
+        finally:
+            store.close()
+        
+    except Exception as e:
+        print(f"Error reading cost store: {str(e)}")
+        return []
+
+
+def format_commitment_text(report):
+    """
+    Format the commitment recommendation for notifications
+    """
+    commitment = report.get('commitment_recommendation')
+    if not commitment or commitment['hourly_commitment'] <= 0:
+        return ""
+    
+    return f"""
+💡 Savings Plans Recommendation:
+  • Commit: ${commitment['hourly_commitment']:.2f}/hour
+  • Est. Monthly Savings: ${commitment['estimated_monthly_savings']:.2f}
+  • Utilization: {commitment['utilization']:.0%} | Coverage: {commitment['coverage']:.0%}
+"""
+
+
+@instrumentation.traced()
 def save_report_to_s3(report, date):
     """
     Save cost report to S3
@@ -215,6 +294,7 @@ def save_report_to_s3(report, date):
         raise
 
 
+@instrumentation.traced()
 def send_alert(title, message, report):
     """
     Send cost alert via SNS
@@ -237,6 +317,7 @@ def send_alert(title, message, report):
 
 💰 Top 5 Services:
 {top_services_text}
+{format_commitment_text(report)}
 
 🔍 View detailed report: s3://{S3_BUCKET}/daily-reports/
         """
@@ -253,6 +334,7 @@ def send_alert(title, message, report):
         print(f"Error sending alert: {str(e)}")
 
 
+@instrumentation.traced()
 def send_summary(report):
     """
     Send daily cost summary
@@ -274,6 +356,7 @@ def send_summary(report):
 
 🔝 Top Services:
 {top_services_text}
+{format_commitment_text(report)}
         """
         
         sns_client.publish(
@@ -0,0 +1,198 @@
+import argparse
+import csv
+import gzip
+import io
+import os
+import re
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from cost_store import CostStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional for local CSV runs
+    pa = None
+    pq = None
+
+# Environment variables
+CHUNK_ROWS = int(os.environ.get('CUR_CHUNK_ROWS', '100000'))
+CHUNK_KEYS = int(os.environ.get('CUR_CHUNK_KEYS', '50000'))
+
+# Aggregation field -> normalized CUR column name
+COLUMNS = {
+    'resource_id': 'line_item_resource_id',
+    'service': 'line_item_product_code',
+    'usage_type': 'line_item_usage_type',
+    'cost': 'line_item_unblended_cost',
+    'usage_amount': 'line_item_usage_amount'
+}
+
+# File suffix -> compression of CSV CUR data files
+CSV_COMPRESSION = {
+    '.csv': None,
+    '.csv.gz': 'gzip',
+    '.csv.zip': 'zip'
+}
+
+csv.field_size_limit(1024 * 1024)
+
+
+def normalize_column(name: str) -> str:
+    """
+    Map CSV column names (lineItem/ResourceId) to the Parquet naming
+    (line_item_resource_id) so both formats share one projection
+    """
+    parts = name.strip().split('/')
+    return '_'.join(re.sub(r'(?<!^)(?=[A-Z])', '_', part).lower() for part in parts)
+
+
+def csv_compression(name: str) -> Optional[str]:
+    """
+    Get the compression of a CSV CUR file from its name
+    """
+    for suffix, compression in CSV_COMPRESSION.items():
+        if name.endswith(suffix):
+            return compression
+    raise ValueError(f"Unsupported CUR compression: {name} (expected .csv, .csv.gz, .csv.zip or .parquet)")
+
+
+def iter_csv_chunks(stream, compressed: bool = True) -> Iterator[Dict[Tuple[str, str, str], List[float]]]:
+    """
+    Stream a (gzip) CSV CUR file and yield bounded chunks of aggregates
+    """
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream)
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+
+    header = [normalize_column(column) for column in next(reader)]
+    try:
+        indexes = [header.index(COLUMNS[field]) for field in
+                   ('resource_id', 'service', 'usage_type', 'cost', 'usage_amount')]
+    except ValueError as e:
+        raise ValueError(f"CUR file is missing a required column: {str(e)}")
+    resource_index, service_index, usage_type_index, cost_index, usage_index = indexes
+
+    aggregates = {}
+    for row in reader:
+        if not row:
+            continue
+
+        key = (row[resource_index], row[service_index], row[usage_type_index])
+        totals = aggregates.get(key)
+        if totals is None:
+            totals = aggregates[key] = [0.0, 0.0]
+        totals[0] += float(row[cost_index] or 0)
+        totals[1] += float(row[usage_index] or 0)
+
+        if len(aggregates) >= CHUNK_KEYS:
+            yield aggregates
+            aggregates = {}
+
+    if aggregates:
+        yield aggregates
+
+
+def iter_parquet_chunks(path: str) -> Iterator[Dict[Tuple[str, str, str], List[float]]]:
+    """
+    Read a Parquet CUR file in record batches, projecting only the needed
+    columns, and yield bounded chunks of aggregates
+    """
+    if pq is None:
+        raise RuntimeError("pyarrow is required to read Parquet CUR files")
+
+    parquet_file = pq.ParquetFile(path)
+    columns = [COLUMNS[field] for field in ('resource_id', 'service', 'usage_type', 'cost', 'usage_amount')]
+
+    aggregates = {}
+    for batch in parquet_file.iter_batches(batch_size=CHUNK_ROWS, columns=columns):
+        grouped = pa.Table.from_batches([batch]).group_by(columns[:3]).aggregate([
+            (COLUMNS['cost'], 'sum'),
+            (COLUMNS['usage_amount'], 'sum')
+        ]).to_pydict()
+
+        for resource_id, service, usage_type, cost, usage_amount in zip(
+            grouped[COLUMNS['resource_id']],
+            grouped[COLUMNS['service']],
+            grouped[COLUMNS['usage_type']],
+            grouped[f"{COLUMNS['cost']}_sum"],
+            grouped[f"{COLUMNS['usage_amount']}_sum"]
+        ):
+            key = (resource_id or '', service or '', usage_type or '')
+            totals = aggregates.get(key)
+            if totals is None:
+                totals = aggregates[key] = [0.0, 0.0]
+            totals[0] += cost or 0.0
+            totals[1] += usage_amount or 0.0
+
+        if len(aggregates) >= CHUNK_KEYS:
+            yield aggregates
+            aggregates = {}
+
+    if aggregates:
+        yield aggregates
+
+
+def ingest_stream(stream, name: str, store: CostStore) -> int:
+    """
+    Aggregate a CSV CUR stream into the store. ZIP archives need a seekable
+    stream. Returns the number of chunks written.
+    """
+    compression = csv_compression(name)
+
+    if compression == 'zip':
+        with zipfile.ZipFile(stream) as archive:
+            members = [member for member in archive.namelist() if member.endswith('.csv')]
+            if len(members) != 1:
+                raise ValueError(f"Expected one CSV file in {name}, found {len(members)}")
+            with archive.open(members[0]) as member:
+                return ingest_stream(member, members[0], store)
+
+    chunks = 0
+    for aggregates in iter_csv_chunks(stream, compressed=compression == 'gzip'):
+        store.add(aggregates)
+        chunks += 1
+    return chunks
+
+
+def ingest_file(path: str, store: CostStore) -> int:
+    """
+    Aggregate a local CUR file (.csv, .csv.gz, .csv.zip or .parquet) into
+    the store.
+    Returns the number of chunks written.
+    """
+    if path.endswith('.parquet'):
+        chunks = 0
+        for aggregates in iter_parquet_chunks(path):
+            store.add(aggregates)
+            chunks += 1
+        return chunks
+
+    with open(path, 'rb') as stream:
+        return ingest_stream(stream, path, store)
+
+
+def main():
+    """
+    Build a cost store from local CUR files, e.g. fixtures
+    """
+    parser = argparse.ArgumentParser(description='Aggregate CUR files into a resource cost store')
+    parser.add_argument('files', nargs='+', help='CUR files (.csv, .csv.gz, .csv.zip or .parquet)')
+    parser.add_argument('--db', default='resource-costs.db', help='Output SQLite store')
+    parser.add_argument('--top', type=int, default=10, help='Print the N most expensive resources')
+    args = parser.parse_args()
+
+    store = CostStore(args.db)
+    for path in args.files:
+        chunks = ingest_file(path, store)
+        print(f"Ingested {path} ({chunks} chunks)")
+    store.compact()
+
+    for resource in store.top_resources(args.top):
+        print(f"{resource['resource_id']}\t{resource['service']}\t${resource['cost']:.2f}")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
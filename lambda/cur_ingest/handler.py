@@ -0,0 +1,171 @@
+import json
+import os
+import boto3
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from cost_store import CostStore, cost_store_key
+from cur_reader import ingest_file, ingest_stream
+from instrumentation import Instrumentation
+
+# Initialize AWS clients
+s3_client = boto3.client('s3')
+sns_client = boto3.client('sns')
+
+instrumentation = Instrumentation('cur_ingest')
+instrumentation.instrument_clients(s3_client, sns_client)
+
+# Environment variables
+CUR_BUCKET = os.environ.get('CUR_BUCKET', '')
+CUR_PREFIX = os.environ.get('CUR_PREFIX', '').strip('/')
+CUR_REPORT_NAME = os.environ.get('CUR_REPORT_NAME', '')
+S3_BUCKET = os.environ['S3_BUCKET']
+SNS_TOPIC_ARN = os.environ['SNS_TOPIC_ARN']
+# AWS keeps updating the previous month's CUR for a few days after it closes
+PREVIOUS_PERIOD_DAYS = int(os.environ.get('CUR_PREVIOUS_PERIOD_DAYS', '5'))
+
+
+@instrumentation.handler
+def lambda_handler(event, context):
+    """
+    Aggregate the Cost and Usage Report for a billing period into a
+    resource cost store
+    """
+    try:
+        if not CUR_BUCKET:
+            print("No CUR bucket configured")
+            return {'statusCode': 200, 'body': 'No CUR bucket configured'}
+
+        if event.get('billing_period'):
+            # Manual runs can name the data files to ingest
+            results = [ingest_billing_period(event['billing_period'], event.get('keys'))]
+        else:
+            results = [
+                ingest_billing_period(billing_period)
+                for billing_period in get_billing_periods(datetime.utcnow())
+            ]
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'CUR ingestion completed',
+                'billing_periods': results
+            })
+        }
+
+    except Exception as e:
+        print(f"Error in CUR ingestion: {str(e)}")
+        send_error_notification(str(e))
+        raise
+
+
+def get_billing_periods(now: datetime) -> List[str]:
+    """
+    Billing periods (YYYY-MM) to ingest: the current month, plus the
+    previous one during the first days of a month while AWS is still
+    finalizing it
+    """
+    periods = [now.strftime('%Y-%m')]
+    if now.day <= PREVIOUS_PERIOD_DAYS:
+        previous = now.replace(day=1) - timedelta(days=1)
+        periods.insert(0, previous.strftime('%Y-%m'))
+    return periods
+
+
+@instrumentation.traced()
+def ingest_billing_period(billing_period: str, report_keys: Optional[List[str]] = None) -> Dict:
+    """
+    Rebuild the cost store of one billing period from its CUR files
+    """
+    print(f"Starting CUR ingestion for {billing_period}")
+
+    report_keys = report_keys or get_report_keys(billing_period)
+
+    if not report_keys:
+        print(f"No CUR files found for {billing_period}")
+        return {'billing_period': billing_period, 'files': 0}
+
+    store_path = f"/tmp/resource-costs-{billing_period}.db"
+    if os.path.exists(store_path):
+        os.remove(store_path)
+
+    store = CostStore(store_path)
+    for key in report_keys:
+        ingest_report_file(key, store)
+
+    with instrumentation.phase('compact_store'):
+        store.compact()
+    store_size = store.size_bytes()
+    store.close()
+
+    save_cost_store(store_path, billing_period)
+    os.remove(store_path)
+
+    return {
+        'billing_period': billing_period,
+        'files': len(report_keys),
+        'store_size_bytes': store_size
+    }
+
+
+@instrumentation.traced()
+def get_report_keys(billing_period: str) -> List[str]:
+    """
+    Get the data file keys of the latest CUR delivery from its manifest
+    """
+    start = datetime.strptime(billing_period, '%Y-%m')
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+    manifest_key = f"{CUR_PREFIX}/{start:%Y%m%d}-{end:%Y%m%d}/{CUR_REPORT_NAME}-Manifest.json".lstrip('/')
+
+    try:
+        response = s3_client.get_object(Bucket=CUR_BUCKET, Key=manifest_key)
+        manifest = json.loads(response['Body'].read())
+        return manifest.get('reportKeys', [])
+
+    except s3_client.exceptions.NoSuchKey:
+        print(f"Manifest not found: s3://{CUR_BUCKET}/{manifest_key}")
+        return []
+
+
+@instrumentation.traced()
+def ingest_report_file(key: str, store: CostStore):
+    """
+    Stream one CUR data file from S3 into the store
+    """
+    if key.endswith(('.parquet', '.zip')):
+        # Parquet and ZIP need random access, so stage them on ephemeral storage
+        local_path = f"/tmp/{os.path.basename(key)}"
+        s3_client.download_file(CUR_BUCKET, key, local_path)
+        try:
+            chunks = ingest_file(local_path, store)
+        finally:
+            os.remove(local_path)
+    else:
+        response = s3_client.get_object(Bucket=CUR_BUCKET, Key=key)
+        chunks = ingest_stream(response['Body'], key, store)
+
+    print(f"Ingested s3://{CUR_BUCKET}/{key} ({chunks} chunks)")
+
+
+@instrumentation.traced()
+def save_cost_store(path: str, billing_period: str):
+    """
+    Save the cost store to S3 for the cost monitor
+    """
+    key = cost_store_key(billing_period)
+    s3_client.upload_file(path, S3_BUCKET, key)
+    print(f"Cost store saved to s3://{S3_BUCKET}/{key}")
+
+
+def send_error_notification(error_message: str):
+    """
+    Send error notification
+    """
+    try:
+        sns_client.publish(
+            TopicArn=SNS_TOPIC_ARN,
+            Subject="❌ CUR Ingestion Error",
+            Message=f"Error in CUR ingestion Lambda:\n\n{error_message}"
+        )
+    except Exception as e:
+        print(f"Error sending error notification: {str(e)}")
@@ -0,0 +1,156 @@
+import json
+import os
+import boto3
+from typing import Dict, Iterator, List, Set, Tuple
+
+from instrumentation import Instrumentation
+from inventory import Inventory, RESOURCE_TYPES, resource_type_for_id
+
+# Initialize AWS clients
+ec2_client = boto3.client('ec2')
+
+# Environment variables
+INVENTORY_TABLE = os.environ['INVENTORY_TABLE']
+
+inventory = Inventory(INVENTORY_TABLE, ec2_client)
+
+instrumentation = Instrumentation('inventory_events')
+instrumentation.instrument_clients(ec2_client, inventory.client)
+
+# CloudTrail events after which the resource is gone
+DELETE_EVENTS = frozenset(['DeleteVolume', 'DeleteSnapshot', 'ReleaseAddress'])
+
+# Instance states after which attached volumes may change state without an
+# event of their own (e.g. volumes kept on termination become available)
+VOLUME_REFRESH_STATES = frozenset(['shutting-down', 'stopped', 'terminated'])
+
+# CloudTrail events that leave an address without its allocation ID in the
+# request (e.g. DisassociateAddress by association ID)
+ADDRESS_EVENTS = frozenset(['AssociateAddress', 'DisassociateAddress'])
+
+# Keys in CloudTrail request/response elements that hold resource IDs
+ID_KEYS = frozenset(['instanceId', 'volumeId', 'snapshotId', 'allocationId', 'resourceId'])
+
+
+@instrumentation.handler
+def lambda_handler(event, context):
+    """
+    Apply an EC2 state-change or CloudTrail event to the resource inventory
+    """
+    try:
+        refresh, delete, rescan, volume_owners = parse_event(event)
+
+        changes = 0
+        with instrumentation.phase('apply_volume_refreshes'):
+            # Runs before deletes, which drop the stored volume IDs
+            for instance_id in volume_owners:
+                changes += inventory.refresh_attached_volumes(instance_id)
+
+        with instrumentation.phase('apply_deletes'):
+            for resource_id in delete:
+                inventory.delete(resource_id)
+
+        changes += len(delete)
+        with instrumentation.phase('apply_refreshes'):
+            for resource_type, resource_ids in group_by_type(refresh).items():
+                changes += inventory.refresh(resource_type, resource_ids)
+            for resource_type in rescan:
+                changes += inventory.refresh_all(resource_type)
+
+        print(f"Applied {event.get('detail-type')} event "
+              f"({len(refresh)} refreshed, {len(delete)} deleted)")
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'Inventory updated',
+                'changes': changes
+            })
+        }
+
+    except Exception as e:
+        print(f"Error applying inventory event: {str(e)}")
+        raise
+
+
+def parse_event(event: Dict) -> Tuple[Set[str], Set[str], List[str], Set[str]]:
+    """
+    Get the resource IDs to refresh and to delete for an EventBridge event,
+    any resource types that have to be rescanned completely and the
+    instances whose volumes have to be refreshed
+    """
+    detail_type = event.get('detail-type', '')
+    detail = event.get('detail', {})
+    refresh = set()
+    delete = set()
+    rescan = []
+    volume_owners = set()
+
+    if detail_type == 'EC2 Instance State-change Notification':
+        instance_id = detail['instance-id']
+        state = detail.get('state')
+        if state == 'terminated':
+            delete.add(instance_id)
+        else:
+            refresh.add(instance_id)
+        if state in VOLUME_REFRESH_STATES:
+            volume_owners.add(instance_id)
+
+    elif detail_type in ('EBS Volume Notification', 'EBS Snapshot Notification'):
+        resource_ids = {arn.split('/')[-1] for arn in event.get('resources', [])}
+        if detail.get('event') == 'deleteVolume':
+            delete.update(resource_ids)
+        else:
+            refresh.update(resource_ids)
+
+    elif detail_type == 'AWS API Call via CloudTrail':
+        if detail.get('errorCode'):
+            # Failed calls don't change anything
+            return refresh, delete, rescan, volume_owners
+
+        event_name = detail.get('eventName', '')
+        resource_ids = set(find_resource_ids(detail.get('requestParameters')))
+        resource_ids.update(find_resource_ids(detail.get('responseElements')))
+
+        if event_name in DELETE_EVENTS:
+            delete.update(resource_ids)
+        else:
+            refresh.update(resource_ids)
+
+        if event_name in ADDRESS_EVENTS and not any(
+            resource_type_for_id(resource_id) == 'address' for resource_id in resource_ids
+        ):
+            # DescribeAddresses is a single call, so rescanning is cheap
+            rescan.append('address')
+
+    else:
+        print(f"Ignoring unsupported event: {detail_type}")
+
+    return refresh, delete, rescan, volume_owners
+
+
+def find_resource_ids(elements) -> Iterator[str]:
+    """
+    Walk CloudTrail request/response elements and yield EC2 resource IDs
+    """
+    if isinstance(elements, dict):
+        for key, value in elements.items():
+            if key in ID_KEYS and isinstance(value, str):
+                yield value
+            else:
+                yield from find_resource_ids(value)
+    elif isinstance(elements, list):
+        for value in elements:
+            yield from find_resource_ids(value)
+
+
+def group_by_type(resource_ids: Set[str]) -> Dict[str, Set[str]]:
+    """
+    Group resource IDs by inventory resource type, dropping untracked types
+    """
+    groups = {}
+    for resource_id in resource_ids:
+        resource_type = resource_type_for_id(resource_id)
+        if resource_type in RESOURCE_TYPES:
+            groups.setdefault(resource_type, set()).add(resource_id)
+    return groups
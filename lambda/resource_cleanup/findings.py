@@ -0,0 +1,307 @@
+import re
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+EMPTY_TAGS = ()
+
+# EC2 IDs end in 8 (legacy) or 17 hex digits; 17 digits need 68 bits
+HEX_DIGITS = re.compile(r'[0-9a-f]{8}|[0-9a-f]{17}')
+LOW_BITS = (1 << 64) - 1
+LONG_ID = 0x10
+OTHER_ID = 0x20
+
+# Distinct free-text values shared per column; enough for generated
+# descriptions without keeping every unique value alive as a str
+STRING_POOL_SIZE = 1024
+
+
+def _epoch(value: datetime) -> int:
+    return int(value.timestamp())
+
+
+def _timestamp(epoch: int) -> str:
+    # Same text as str() of the timezone-aware datetimes boto3 returns
+    return str(datetime.fromtimestamp(epoch, timezone.utc))
+
+
+class IdColumn:
+    """
+    EC2 resource IDs of one type packed into integer arrays: the low 64
+    bits of the hex suffix plus a byte holding the remaining bits and the
+    suffix length. IDs in any other form are kept as strings on the side.
+    """
+    __slots__ = ('prefix', 'low', 'high', 'other')
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.low = array('Q')
+        self.high = array('B')
+        self.other: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.low)
+
+    def append(self, resource_id: str):
+        suffix = resource_id[len(self.prefix):]
+        if resource_id.startswith(self.prefix) and HEX_DIGITS.fullmatch(suffix):
+            value = int(suffix, 16)
+            self.low.append(value & LOW_BITS)
+            self.high.append(value >> 64 | (LONG_ID if len(suffix) == 17 else 0))
+        else:
+            self.other[len(self.low)] = resource_id
+            self.low.append(0)
+            self.high.append(OTHER_ID)
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self.low)
+        flags = self.high[index]
+        if flags & OTHER_ID:
+            return self.other[index]
+        value = (flags & 0x0F) << 64 | self.low[index]
+        return f"{self.prefix}{value:0{17 if flags & LONG_ID else 8}x}"
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self.low)):
+            yield self[index]
+
+
+class StringColumn:
+    """
+    Free-text values stored as UTF-8 in one buffer, addressed by offset
+    and length
+    """
+    __slots__ = ('data', 'starts', 'lengths', 'pool')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.starts = array('I')
+        self.lengths = array('I')
+        self.pool: Dict[str, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def append(self, value: str):
+        span = self.pool.get(value)
+        if span is None:
+            encoded = value.encode('utf-8')
+            span = (len(self.data), len(encoded))
+            self.data += encoded
+            if len(self.pool) < STRING_POOL_SIZE:
+                self.pool[value] = span
+        self.starts.append(span[0])
+        self.lengths.append(span[1])
+
+    def __getitem__(self, index: int) -> str:
+        start = self.starts[index]
+        return self.data[start:start + self.lengths[index]].decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self.starts)):
+            yield self[index]
+
+
+class FindingTable(ABC):
+    """
+    Columnar store for findings of one resource type. IDs are packed into
+    integers, timestamps are kept as epoch seconds in typed arrays and
+    repeated strings (types, tag keys and values, whole tag sets) are
+    pooled per table, so a finding costs a few dozen bytes instead of a
+    dict of strings. JSON report dicts are only built by to_dicts() at the
+    output boundary.
+    """
+    __slots__ = ('ids', 'now', '_pool')
+
+    id_prefix = ''
+
+    def __init__(self, now: Optional[datetime] = None):
+        self.ids = IdColumn(self.id_prefix)
+        self.now = _epoch(now or datetime.now(timezone.utc))
+        self._pool: Dict = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _intern(self, value):
+        return self._pool.setdefault(value, value)
+
+    def _tags(self, tags: Optional[List[Dict]]) -> Tuple:
+        if not tags:
+            return EMPTY_TAGS
+        return self._intern(tuple(
+            (self._intern(tag['Key']), self._intern(tag['Value'])) for tag in tags
+        ))
+
+    def _age_days(self, epoch: int) -> int:
+        return (self.now - epoch) // 86400
+
+    @abstractmethod
+    def to_dicts(self) -> List[Dict]:
+        """
+        Findings in the JSON report shape
+        """
+
+
+class InstanceFindings(FindingTable):
+    """Idle EC2 instances"""
+    __slots__ = ('types', 'avg_cpu', 'launched', 'tags')
+
+    id_prefix = 'i-'
+
+    def __init__(self, now: Optional[datetime] = None):
+        super().__init__(now)
+        self.types: List[str] = []
+        self.avg_cpu = array('d')
+        self.launched = array('q')
+        self.tags: List[Tuple] = []
+
+    def append(self, instance: Dict, avg_cpu: float):
+        self.ids.append(instance['InstanceId'])
+        self.types.append(self._intern(instance['InstanceType']))
+        self.avg_cpu.append(avg_cpu)
+        self.launched.append(_epoch(instance['LaunchTime']))
+        self.tags.append(self._tags(instance.get('Tags')))
+
+    def type_counts(self) -> Counter:
+        return Counter(self.types)
+
+    def to_dicts(self) -> List[Dict]:
+        return [
+            {
+                'instance_id': instance_id,
+                'instance_type': instance_type,
+                'avg_cpu': avg_cpu,
+                'launch_time': _timestamp(launched),
+                'tags': dict(tags)
+            }
+            for instance_id, instance_type, avg_cpu, launched, tags
+            in zip(self.ids, self.types, self.avg_cpu, self.launched, self.tags)
+        ]
+
+
+class VolumeFindings(FindingTable):
+    """Unattached EBS volumes"""
+    __slots__ = ('sizes', 'types', 'created', 'tags')
+
+    id_prefix = 'vol-'
+
+    def __init__(self, now: Optional[datetime] = None):
+        super().__init__(now)
+        # GiB; EBS volumes are at most 64 TiB
+        self.sizes = array('I')
+        self.types: List[str] = []
+        self.created = array('q')
+        self.tags: List[Tuple] = []
+
+    def append(self, volume: Dict) -> int:
+        """
+        Add a volume and return its age in days
+        """
+        created = _epoch(volume['CreateTime'])
+        self.ids.append(volume['VolumeId'])
+        self.sizes.append(volume['Size'])
+        self.types.append(self._intern(volume['VolumeType']))
+        self.created.append(created)
+        self.tags.append(self._tags(volume.get('Tags')))
+        return self._age_days(created)
+
+    def total_size(self) -> int:
+        return sum(self.sizes)
+
+    def to_dicts(self) -> List[Dict]:
+        return [
+            {
+                'volume_id': volume_id,
+                'size': size,
+                'volume_type': volume_type,
+                'create_time': _timestamp(created),
+                'age_days': self._age_days(created),
+                'tags': dict(tags)
+            }
+            for volume_id, size, volume_type, created, tags
+            in zip(self.ids, self.sizes, self.types, self.created, self.tags)
+        ]
+
+
+class SnapshotFindings(FindingTable):
+    """Old EBS snapshots"""
+    __slots__ = ('volume_ids', 'sizes', 'started', 'descriptions')
+
+    id_prefix = 'snap-'
+
+    def __init__(self, now: Optional[datetime] = None):
+        super().__init__(now)
+        self.volume_ids = IdColumn('vol-')
+        self.sizes = array('I')
+        self.started = array('q')
+        self.descriptions = StringColumn()
+
+    def append(self, snapshot: Dict) -> int:
+        """
+        Add a snapshot and return its age in days
+        """
+        started = _epoch(snapshot['StartTime'])
+        self.ids.append(snapshot['SnapshotId'])
+        self.volume_ids.append(snapshot.get('VolumeId', 'N/A'))
+        self.sizes.append(snapshot['VolumeSize'])
+        self.started.append(started)
+        self.descriptions.append(snapshot.get('Description', ''))
+        return self._age_days(started)
+
+    def total_size(self) -> int:
+        return sum(self.sizes)
+
+    def to_dicts(self) -> List[Dict]:
+        return [
+            {
+                'snapshot_id': snapshot_id,
+                'volume_id': volume_id,
+                'size': size,
+                'start_time': _timestamp(started),
+                'age_days': self._age_days(started),
+                'description': description
+            }
+            for snapshot_id, volume_id, size, started, description
+            in zip(self.ids, self.volume_ids, self.sizes, self.started, self.descriptions)
+        ]
+
+
+class AddressFindings(FindingTable):
+    """Unassociated Elastic IPs"""
+    __slots__ = ('public_ips', 'domains')
+
+    id_prefix = 'eipalloc-'
+
+    def __init__(self, now: Optional[datetime] = None):
+        super().__init__(now)
+        self.public_ips: List[str] = []
+        self.domains: List[str] = []
+
+    def append(self, address: Dict):
+        self.ids.append(address['AllocationId'])
+        self.public_ips.append(address['PublicIp'])
+        self.domains.append(self._intern(address['Domain']))
+
+    def to_dicts(self) -> List[Dict]:
+        return [
+            {
+                'allocation_id': allocation_id,
+                'public_ip': public_ip,
+                'domain': domain
+            }
+            for allocation_id, public_ip, domain in zip(self.ids, self.public_ips, self.domains)
+        ]
+
+
+def report_to_dict(report: Dict) -> Dict:
+    """
+    Convert finding tables in a cleanup report to the JSON report shape
+    """
+    return {
+        key: value.to_dicts() if isinstance(value, FindingTable) else value
+        for key, value in report.items()
+    }
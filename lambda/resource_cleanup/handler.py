@@ -2,7 +2,14 @@ import json
 import os
 import boto3
 from datetime import datetime, timedelta
-from typing import List, Dict
+from itertools import chain, repeat
+from typing import Iterator, List, Dict, Optional
+
+from instrumentation import Instrumentation
+from cost_store import download_cost_store
+from findings import AddressFindings, InstanceFindings, SnapshotFindings, VolumeFindings, report_to_dict
+from inventory import Inventory, describe
+from policy import CompiledPolicy, compile_policies, load_policy_document, merge_policies
 
 # Initialize AWS clients
 ec2_client = boto3.client('ec2')
@@ -11,6 +18,9 @@ cloudwatch = boto3.client('cloudwatch')
 s3_client = boto3.client('s3')
 sns_client = boto3.client('sns')
 
+instrumentation = Instrumentation('resource_cleanup')
+instrumentation.instrument_clients(ec2_client, rds_client, cloudwatch, s3_client, sns_client)
+
 # Environment variables
 DRY_RUN = os.environ.get('DRY_RUN', 'true').lower() == 'true'
 CLEANUP_ENABLED = os.environ.get('CLEANUP_ENABLED', 'false').lower() == 'true'
@@ -19,8 +29,17 @@ VOLUME_AGE_DAYS = int(os.environ.get('VOLUME_AGE_DAYS', '30'))
 SNAPSHOT_AGE_DAYS = int(os.environ.get('SNAPSHOT_AGE_DAYS', '90'))
 S3_BUCKET = os.environ['S3_BUCKET']
 SNS_TOPIC_ARN = os.environ['SNS_TOPIC_ARN']
+INVENTORY_TABLE = os.environ.get('INVENTORY_TABLE', '')
+RECONCILE_INTERVAL_DAYS = int(os.environ.get('RECONCILE_INTERVAL_DAYS', '7'))
+CLEANUP_POLICY_KEY = os.environ.get('CLEANUP_POLICY_KEY', '')
 
+# Persistent inventory kept current by the inventory_events function
+inventory = Inventory(INVENTORY_TABLE, ec2_client) if INVENTORY_TABLE else None
+if inventory:
+    instrumentation.instrument_clients(inventory.client)
 
+
+@instrumentation.handler
 def lambda_handler(event, context):
     """
     Main Lambda handler for resource cleanup
@@ -32,29 +51,35 @@ def lambda_handler(event, context):
             'timestamp': str(datetime.now()),
             'dry_run': DRY_RUN,
             'cleanup_enabled': CLEANUP_ENABLED,
-            'idle_instances': [],
-            'unattached_volumes': [],
-            'old_snapshots': [],
-            'idle_elastic_ips': [],
+            'idle_instances': InstanceFindings(),
+            'unattached_volumes': VolumeFindings(),
+            'old_snapshots': SnapshotFindings(),
+            'idle_elastic_ips': AddressFindings(),
             'actions_taken': [],
             'estimated_savings': 0.0
         }
         
+        # Compile cleanup policies once for this run
+        policies = load_policies()
+        
+        # Each check reads its resources from the inventory when available
+        from_inventory = sync_inventory()
+        
         # Find idle EC2 instances
         if CLEANUP_ENABLED:
-            cleanup_report['idle_instances'] = find_idle_instances()
+            cleanup_report['idle_instances'] = find_idle_instances(policies['instance'], from_inventory)
         
         # Find unattached EBS volumes
-        cleanup_report['unattached_volumes'] = find_unattached_volumes()
+        cleanup_report['unattached_volumes'] = find_unattached_volumes(policies['volume'], from_inventory)
         
         # Find old snapshots
-        cleanup_report['old_snapshots'] = find_old_snapshots()
+        cleanup_report['old_snapshots'] = find_old_snapshots(policies['snapshot'], from_inventory)
         
         # Find idle Elastic IPs
-        cleanup_report['idle_elastic_ips'] = find_idle_elastic_ips()
+        cleanup_report['idle_elastic_ips'] = find_idle_elastic_ips(policies['address'], from_inventory)
         
         # Calculate estimated savings
-        cleanup_report['estimated_savings'] = calculate_savings(cleanup_report)
+        cleanup_report['estimated_savings'] = calculate_savings(cleanup_report, load_resource_costs(cleanup_report))
         
         # Take cleanup actions if not in dry run mode
         if not DRY_RUN and CLEANUP_ENABLED:
@@ -81,35 +106,118 @@ def lambda_handler(event, context):
         raise
 
 
-def find_idle_instances() -> List[Dict]:
+def default_policies() -> Dict[str, Dict]:
     """
-    Find EC2 instances with low CPU utilization
+    Cleanup policies built from the environment configuration
     """
-    idle_instances = []
+    return {
+        'instance': {
+            'state': ['running'],
+            'metrics': {'CPUUtilization': {'below': CPU_THRESHOLD, 'days': 7}}
+        },
+        'volume': {
+            'state': ['available'],
+            'min_age_days': VOLUME_AGE_DAYS
+        },
+        'snapshot': {
+            'min_age_days': SNAPSHOT_AGE_DAYS,
+            'exclude_tags': {'keep': []}
+        },
+        'address': {
+            'associated': False
+        }
+    }
+
+
+@instrumentation.traced()
+def load_policies() -> Dict[str, CompiledPolicy]:
+    """
+    Load team-owned policy overrides from S3 and compile all policies.
+    Invalid policies fail the run rather than cleaning up with rules
+    nobody intended.
+    """
+    policies = default_policies()
+    
+    if CLEANUP_POLICY_KEY:
+        try:
+            response = s3_client.get_object(Bucket=S3_BUCKET, Key=CLEANUP_POLICY_KEY)
+            overrides = load_policy_document(response['Body'].read())
+            policies = merge_policies(policies, overrides)
+            print(f"Loaded cleanup policy from s3://{S3_BUCKET}/{CLEANUP_POLICY_KEY}")
+        except s3_client.exceptions.ClientError as e:
+            # NoSuchKey needs s3:ListBucket, otherwise S3 reports a missing key as 403
+            if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+                raise
+            print("No cleanup policy overrides found, using defaults")
+    
+    return compile_policies(policies)
+
+
+@instrumentation.traced()
+def sync_inventory() -> bool:
+    """
+    Check whether the persistent inventory can be used, running a full
+    reconciliation scan when the last one is older than the interval
+    """
+    if inventory is None:
+        return False
     
     try:
-        response = ec2_client.describe_instances(
-            Filters=[
-                {'Name': 'instance-state-name', 'Values': ['running']}
-            ]
-        )
+        if inventory.needs_reconcile(RECONCILE_INTERVAL_DAYS):
+            print("Running full inventory reconciliation")
+            inventory.reconcile()
+        return True
         
-        for reservation in response['Reservations']:
-            for instance in reservation['Instances']:
-                instance_id = instance['InstanceId']
-                
-                # Get CPU utilization for last 7 days
-                avg_cpu = get_average_cpu(instance_id, days=7)
-                
-                if avg_cpu < CPU_THRESHOLD:
-                    idle_instances.append({
-                        'instance_id': instance_id,
-                        'instance_type': instance['InstanceType'],
-                        'avg_cpu': avg_cpu,
-                        'launch_time': str(instance['LaunchTime']),
-                        'tags': {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
-                    })
-                    print(f"Found idle instance: {instance_id} (CPU: {avg_cpu:.2f}%)")
+    except Exception as e:
+        print(f"Error reading inventory, falling back to full scan: {str(e)}")
+        return False
+
+
+def load_resources(resource_type: str, policy: CompiledPolicy, from_inventory: bool = False) -> Iterator[Dict]:
+    """
+    Yield resources of a type that match a policy, page by page from the
+    inventory or from a live scan. An inventory that fails before
+    returning anything falls back to the live scan.
+    """
+    if from_inventory:
+        loaded = False
+        try:
+            for resource in inventory.load(resource_type):
+                loaded = True
+                if policy.matches(resource):
+                    yield resource
+            return
+        except Exception as e:
+            if loaded:
+                raise
+            print(f"Error loading {resource_type} inventory, falling back to full scan: {str(e)}")
+    
+    for resource in describe(ec2_client, resource_type, policy.filters):
+        if policy.residual(resource):
+            yield resource
+
+
+@instrumentation.traced()
+def find_idle_instances(policy: CompiledPolicy, from_inventory: bool = False) -> InstanceFindings:
+    """
+    Find EC2 instances with low CPU utilization
+    """
+    idle_instances = InstanceFindings()
+    
+    try:
+        for instance in load_resources('instance', policy, from_inventory):
+            instance_id = instance['InstanceId']
+            
+            # Metric conditions are the most expensive, so they run last
+            metric_values = {
+                metric: get_average_metric(instance_id, metric, days=condition.get('days', 7))
+                for metric, condition in policy.metric_conditions.items()
+            }
+            
+            if policy.metrics_match(metric_values):
+                avg_cpu = metric_values.get('CPUUtilization') or 0.0
+                idle_instances.append(instance, avg_cpu)
+                print(f"Found idle instance: {instance_id} (CPU: {avg_cpu:.2f}%)")
         
     except Exception as e:
         print(f"Error finding idle instances: {str(e)}")
@@ -117,9 +225,10 @@ def find_idle_instances() -> List[Dict]:
     return idle_instances
 
 
-def get_average_cpu(instance_id: str, days: int = 7) -> float:
+@instrumentation.traced()
+def get_average_metric(instance_id: str, metric_name: str = 'CPUUtilization', days: int = 7) -> Optional[float]:
     """
-    Get average CPU utilization for an EC2 instance
+    Get the average of an EC2 CloudWatch metric for an instance
     """
     try:
         end_time = datetime.now()
@@ -127,7 +236,7 @@ def get_average_cpu(instance_id: str, days: int = 7) -> float:
         
         response = cloudwatch.get_metric_statistics(
             Namespace='AWS/EC2',
-            MetricName='CPUUtilization',
+            MetricName=metric_name,
             Dimensions=[
                 {'Name': 'InstanceId', 'Value': instance_id}
             ],
@@ -138,46 +247,26 @@ def get_average_cpu(instance_id: str, days: int = 7) -> float:
         )
         
         if response['Datapoints']:
-            avg_cpu = sum(dp['Average'] for dp in response['Datapoints']) / len(response['Datapoints'])
-            return avg_cpu
+            return sum(dp['Average'] for dp in response['Datapoints']) / len(response['Datapoints'])
         
         return 0.0
         
     except Exception as e:
-        print(f"Error getting CPU metrics for {instance_id}: {str(e)}")
-        return 100.0  # Return high value to avoid flagging on error
+        print(f"Error getting {metric_name} metrics for {instance_id}: {str(e)}")
+        return None  # Never matches, to avoid flagging on error
 
 
-def find_unattached_volumes() -> List[Dict]:
+@instrumentation.traced()
+def find_unattached_volumes(policy: CompiledPolicy, from_inventory: bool = False) -> VolumeFindings:
     """
     Find unattached EBS volumes older than threshold
     """
-    unattached_volumes = []
+    unattached_volumes = VolumeFindings()
     
     try:
-        response = ec2_client.describe_volumes(
-            Filters=[
-                {'Name': 'status', 'Values': ['available']}
-            ]
-        )
-        
-        cutoff_date = datetime.now().replace(tzinfo=None) - timedelta(days=VOLUME_AGE_DAYS)
-        
-        for volume in response['Volumes']:
-            create_time = volume['CreateTime'].replace(tzinfo=None)
-            
-            if create_time < cutoff_date:
-                age_days = (datetime.now().replace(tzinfo=None) - create_time).days
-                
-                unattached_volumes.append({
-                    'volume_id': volume['VolumeId'],
-                    'size': volume['Size'],
-                    'volume_type': volume['VolumeType'],
-                    'create_time': str(volume['CreateTime']),
-                    'age_days': age_days,
-                    'tags': {tag['Key']: tag['Value'] for tag in volume.get('Tags', [])}
-                })
-                print(f"Found unattached volume: {volume['VolumeId']} (Age: {age_days} days)")
+        for volume in load_resources('volume', policy, from_inventory):
+            age_days = unattached_volumes.append(volume)
+            print(f"Found unattached volume: {volume['VolumeId']} (Age: {age_days} days)")
         
     except Exception as e:
         print(f"Error finding unattached volumes: {str(e)}")
@@ -185,37 +274,17 @@ def find_unattached_volumes() -> List[Dict]:
     return unattached_volumes
 
 
-def find_old_snapshots() -> List[Dict]:
+@instrumentation.traced()
+def find_old_snapshots(policy: CompiledPolicy, from_inventory: bool = False) -> SnapshotFindings:
     """
     Find old EBS snapshots without tags
     """
-    old_snapshots = []
+    old_snapshots = SnapshotFindings()
     
     try:
-        response = ec2_client.describe_snapshots(
-            OwnerIds=['self']
-        )
-        
-        cutoff_date = datetime.now().replace(tzinfo=None) - timedelta(days=SNAPSHOT_AGE_DAYS)
-        
-        for snapshot in response['Snapshots']:
-            start_time = snapshot['StartTime'].replace(tzinfo=None)
-            
-            # Only flag snapshots without important tags and older than threshold
-            has_keep_tag = any(tag['Key'].lower() == 'keep' for tag in snapshot.get('Tags', []))
-            
-            if start_time < cutoff_date and not has_keep_tag:
-                age_days = (datetime.now().replace(tzinfo=None) - start_time).days
-                
-                old_snapshots.append({
-                    'snapshot_id': snapshot['SnapshotId'],
-                    'volume_id': snapshot.get('VolumeId', 'N/A'),
-                    'size': snapshot['VolumeSize'],
-                    'start_time': str(snapshot['StartTime']),
-                    'age_days': age_days,
-                    'description': snapshot.get('Description', '')
-                })
-                print(f"Found old snapshot: {snapshot['SnapshotId']} (Age: {age_days} days)")
+        for snapshot in load_resources('snapshot', policy, from_inventory):
+            age_days = old_snapshots.append(snapshot)
+            print(f"Found old snapshot: {snapshot['SnapshotId']} (Age: {age_days} days)")
         
     except Exception as e:
         print(f"Error finding old snapshots: {str(e)}")
@@ -223,23 +292,17 @@ def find_old_snapshots() -> List[Dict]:
     return old_snapshots
 
 
-def find_idle_elastic_ips() -> List[Dict]:
+@instrumentation.traced()
+def find_idle_elastic_ips(policy: CompiledPolicy, from_inventory: bool = False) -> AddressFindings:
     """
     Find unassociated Elastic IPs
     """
-    idle_eips = []
+    idle_eips = AddressFindings()
     
     try:
-        response = ec2_client.describe_addresses()
-        
-        for address in response['Addresses']:
-            if 'AssociationId' not in address:
-                idle_eips.append({
-                    'allocation_id': address['AllocationId'],
-                    'public_ip': address['PublicIp'],
-                    'domain': address['Domain']
-                })
-                print(f"Found idle Elastic IP: {address['PublicIp']}")
+        for address in load_resources('address', policy, from_inventory):
+            idle_eips.append(address)
+            print(f"Found idle Elastic IP: {address['PublicIp']}")
         
     except Exception as e:
         print(f"Error finding idle Elastic IPs: {str(e)}")
@@ -247,22 +310,64 @@ def find_idle_elastic_ips() -> List[Dict]:
     return idle_eips
 
 
-def calculate_savings(report: Dict) -> float:
+@instrumentation.traced()
+def load_resource_costs(report: Dict) -> Dict[str, float]:
+    """
+    Get last month's CUR cost of every finding from the cost store
+    """
+    try:
+        previous_month = datetime.now().replace(day=1) - timedelta(days=1)
+        store = download_cost_store(s3_client, S3_BUCKET, f"{previous_month.year}-{previous_month.month:02d}")
+        if store is None:
+            return {}
+        
+        try:
+            return store.cost_for_resources(chain(
+                report['idle_instances'].ids,
+                report['unattached_volumes'].ids,
+                report['old_snapshots'].ids,
+                report['idle_elastic_ips'].ids
+            ))
+        finally:
+            store.close()
+        
+    except Exception as e:
+        print(f"Error reading resource costs, using estimates: {str(e)}")
+        return {}
+
+
+def cur_adjustment(ids, estimates, resource_costs: Dict[str, float]) -> float:
+    """
+    Difference between CUR costs and estimates for the resources the cost
+    store has data for
     """
-    Calculate estimated monthly savings
+    return sum(
+        resource_costs[resource_id] - estimate
+        for resource_id, estimate in zip(ids, estimates)
+        if resource_id in resource_costs
+    )
+
+
+@instrumentation.traced()
+def calculate_savings(report: Dict, resource_costs: Optional[Dict[str, float]] = None) -> float:
+    """
+    Calculate estimated monthly savings. Resources with a CUR cost for last
+    month use that cost instead of the list price estimate.
     """
     savings = 0.0
+    volumes = report['unattached_volumes']
+    snapshots = report['old_snapshots']
+    eips = report['idle_elastic_ips']
+    instances = report['idle_instances']
     
     # EBS volume costs (approx $0.10 per GB per month for gp3)
-    for volume in report['unattached_volumes']:
-        savings += volume['size'] * 0.10
+    savings += volumes.total_size() * 0.10
     
     # Snapshot costs (approx $0.05 per GB per month)
-    for snapshot in report['old_snapshots']:
-        savings += snapshot['size'] * 0.05
+    savings += snapshots.total_size() * 0.05
     
     # Elastic IP costs ($0.005 per hour = ~$3.60 per month)
-    savings += len(report['idle_elastic_ips']) * 3.60
+    savings += len(eips) * 3.60
     
     # EC2 instance costs (estimated, varies by instance type)
     # Simple estimation: t3.micro = $7.50/month, t3.small = $15/month, etc.
@@ -272,13 +377,23 @@ def calculate_savings(report: Dict) -> float:
         't3.large': 60, 't3.xlarge': 120
     }
     
-    for instance in report['idle_instances']:
-        instance_type = instance['instance_type']
-        savings += instance_cost_map.get(instance_type, 50)  # Default $50 if unknown
+    for instance_type, count in instances.type_counts().items():
+        savings += instance_cost_map.get(instance_type, 50) * count  # Default $50 if unknown
+    
+    if resource_costs:
+        savings += cur_adjustment(volumes.ids, (size * 0.10 for size in volumes.sizes), resource_costs)
+        savings += cur_adjustment(snapshots.ids, (size * 0.05 for size in snapshots.sizes), resource_costs)
+        savings += cur_adjustment(eips.ids, repeat(3.60), resource_costs)
+        savings += cur_adjustment(
+            instances.ids,
+            (instance_cost_map.get(instance_type, 50) for instance_type in instances.types),
+            resource_costs
+        )
     
     return round(savings, 2)
 
 
+@instrumentation.traced()
 def perform_cleanup(report: Dict) -> List[str]:
     """
     Perform actual cleanup actions
@@ -287,40 +402,41 @@ def perform_cleanup(report: Dict) -> List[str]:
     
     try:
         # Delete unattached volumes
-        for volume in report['unattached_volumes']:
+        for volume_id in report['unattached_volumes'].ids:
             try:
-                ec2_client.delete_volume(VolumeId=volume['volume_id'])
-                actions.append(f"Deleted volume: {volume['volume_id']}")
-                print(f"Deleted volume: {volume['volume_id']}")
+                ec2_client.delete_volume(VolumeId=volume_id)
+                actions.append(f"Deleted volume: {volume_id}")
+                print(f"Deleted volume: {volume_id}")
             except Exception as e:
-                print(f"Error deleting volume {volume['volume_id']}: {str(e)}")
+                print(f"Error deleting volume {volume_id}: {str(e)}")
         
         # Delete old snapshots
-        for snapshot in report['old_snapshots']:
+        for snapshot_id in report['old_snapshots'].ids:
             try:
-                ec2_client.delete_snapshot(SnapshotId=snapshot['snapshot_id'])
-                actions.append(f"Deleted snapshot: {snapshot['snapshot_id']}")
-                print(f"Deleted snapshot: {snapshot['snapshot_id']}")
+                ec2_client.delete_snapshot(SnapshotId=snapshot_id)
+                actions.append(f"Deleted snapshot: {snapshot_id}")
+                print(f"Deleted snapshot: {snapshot_id}")
             except Exception as e:
-                print(f"Error deleting snapshot {snapshot['snapshot_id']}: {str(e)}")
+                print(f"Error deleting snapshot {snapshot_id}: {str(e)}")
         
         # Release idle Elastic IPs
-        for eip in report['idle_elastic_ips']:
+        eips = report['idle_elastic_ips']
+        for allocation_id, public_ip in zip(eips.ids, eips.public_ips):
             try:
-                ec2_client.release_address(AllocationId=eip['allocation_id'])
-                actions.append(f"Released Elastic IP: {eip['public_ip']}")
-                print(f"Released Elastic IP: {eip['public_ip']}")
+                ec2_client.release_address(AllocationId=allocation_id)
+                actions.append(f"Released Elastic IP: {public_ip}")
+                print(f"Released Elastic IP: {public_ip}")
             except Exception as e:
-                print(f"Error releasing Elastic IP {eip['public_ip']}: {str(e)}")
+                print(f"Error releasing Elastic IP {public_ip}: {str(e)}")
         
         # Stop idle instances (don't terminate by default)
-        for instance in report['idle_instances']:
+        for instance_id in report['idle_instances'].ids:
             try:
-                ec2_client.stop_instances(InstanceIds=[instance['instance_id']])
-                actions.append(f"Stopped instance: {instance['instance_id']}")
-                print(f"Stopped instance: {instance['instance_id']}")
+                ec2_client.stop_instances(InstanceIds=[instance_id])
+                actions.append(f"Stopped instance: {instance_id}")
+                print(f"Stopped instance: {instance_id}")
             except Exception as e:
-                print(f"Error stopping instance {instance['instance_id']}: {str(e)}")
+                print(f"Error stopping instance {instance_id}: {str(e)}")
         
     except Exception as e:
         print(f"Error performing cleanup: {str(e)}")
@@ -328,6 +444,7 @@ def perform_cleanup(report: Dict) -> List[str]:
     return actions
 
 
+@instrumentation.traced()
 def save_cleanup_report(report: Dict):
     """
     Save cleanup report to S3
@@ -339,7 +456,7 @@ def save_cleanup_report(report: Dict):
         s3_client.put_object(
             Bucket=S3_BUCKET,
             Key=key,
-            Body=json.dumps(report, indent=2, default=str),
+            Body=json.dumps(report_to_dict(report), indent=2, default=str),
             ContentType='application/json'
         )
         
@@ -349,6 +466,7 @@ def save_cleanup_report(report: Dict):
         print(f"Error saving cleanup report: {str(e)}")
 
 
+@instrumentation.traced()
 def send_cleanup_notification(report: Dict):
     """
     Send cleanup notification via SNS
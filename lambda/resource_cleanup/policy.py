@@ -0,0 +1,396 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+# Per resource type: describe filter names for pushdown and the fields
+# conditions are evaluated against
+RESOURCE_FIELDS = {
+    'instance': {
+        'state_filter': 'instance-state-name',
+        'type_filter': 'instance-type',
+        'state': lambda resource: resource['State']['Name'],
+        'type': 'InstanceType',
+        'created': 'LaunchTime',
+        'size': None
+    },
+    'volume': {
+        'state_filter': 'status',
+        'type_filter': 'volume-type',
+        'state': lambda resource: resource['State'],
+        'type': 'VolumeType',
+        'created': 'CreateTime',
+        'size': 'Size'
+    },
+    'snapshot': {
+        'state_filter': 'status',
+        'type_filter': None,
+        'state': lambda resource: resource['State'],
+        'type': None,
+        'created': 'StartTime',
+        'size': 'VolumeSize'
+    },
+    'address': {
+        'state_filter': None,
+        'type_filter': None,
+        'state': None,
+        'type': None,
+        'created': None,
+        'size': None
+    }
+}
+
+POLICY_KEYS = frozenset([
+    'state', 'types', 'min_age_days', 'min_size_gb', 'max_size_gb',
+    'include_tags', 'exclude_tags', 'associated', 'metrics'
+])
+
+METRIC_KEYS = frozenset(['below', 'above', 'days'])
+
+LIST_KEYS = ('state', 'types')
+NUMBER_KEYS = ('min_age_days', 'min_size_gb', 'max_size_gb')
+TAG_KEYS = ('include_tags', 'exclude_tags')
+
+
+class PolicyError(ValueError):
+    """Raised for invalid cleanup policies"""
+
+
+class CompiledPolicy:
+    """
+    Cleanup policy for one resource type, compiled into describe filters
+    and predicate functions
+    """
+
+    def __init__(self, resource_type: str, filters: List[Dict],
+                 matches: Callable[[Dict], bool], residual: Callable[[Dict], bool],
+                 metric_conditions: Dict[str, Dict]):
+        self.resource_type = resource_type
+        # Filters entries pushed down to the describe_* call
+        self.filters = filters
+        # All conditions, for resources that were not filtered server-side
+        # (e.g. loaded from the inventory)
+        self.matches = matches
+        # Conditions the pushed-down filters could not express
+        self.residual = residual
+        # CloudWatch metric -> {'below', 'above', 'days'}
+        self.metric_conditions = metric_conditions
+
+    def metrics_match(self, values: Dict[str, Optional[float]]) -> bool:
+        """
+        Check fetched metric averages against the metric conditions. A
+        missing value (fetch error) never matches.
+        """
+        for metric, condition in self.metric_conditions.items():
+            value = values.get(metric)
+            if value is None:
+                return False
+            if 'below' in condition and not value < condition['below']:
+                return False
+            if 'above' in condition and not value > condition['above']:
+                return False
+        return True
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_string_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def validate_policy(resource_type: str, policy: Dict):
+    """
+    Check policy keys and value types, so bad documents fail with a
+    PolicyError instead of a TypeError deep in compilation
+    """
+    if not isinstance(policy, dict):
+        raise PolicyError(f"{resource_type} policy must be a JSON object")
+
+    unknown = set(policy) - POLICY_KEYS
+    if unknown:
+        raise PolicyError(f"Unknown {resource_type} policy keys: {', '.join(sorted(unknown))}")
+
+    for key, value in policy.items():
+        if value is None:
+            continue
+
+        if key in LIST_KEYS:
+            if not _is_string_list(value) or not value:
+                raise PolicyError(f"{resource_type} '{key}' must be a non-empty list of strings")
+
+        elif key in NUMBER_KEYS:
+            if not _is_number(value) or value < 0:
+                raise PolicyError(f"{resource_type} '{key}' must be a non-negative number")
+
+        elif key in TAG_KEYS:
+            if not isinstance(value, dict) or not all(
+                isinstance(tag_key, str) and _is_string_list(tag_values)
+                for tag_key, tag_values in value.items()
+            ):
+                raise PolicyError(f"{resource_type} '{key}' must map tag keys to lists of values")
+
+        elif key == 'associated':
+            if not isinstance(value, bool):
+                raise PolicyError(f"{resource_type} 'associated' must be true or false")
+
+        elif key == 'metrics':
+            if not isinstance(value, dict):
+                raise PolicyError(f"{resource_type} 'metrics' must map metric names to conditions")
+            for metric, condition in value.items():
+                if not isinstance(condition, dict):
+                    raise PolicyError(f"{metric} condition must be a JSON object")
+                unknown = set(condition) - METRIC_KEYS
+                if unknown:
+                    raise PolicyError(f"Unknown {metric} condition keys: {', '.join(sorted(unknown))}")
+                if 'below' not in condition and 'above' not in condition:
+                    raise PolicyError(f"{metric} condition needs 'below' or 'above'")
+                if not all(_is_number(limit) for limit in condition.values()):
+                    raise PolicyError(f"{metric} condition values must be numbers")
+
+
+def _all(predicates: List[Callable[[Dict], bool]]) -> Callable[[Dict], bool]:
+    if not predicates:
+        return lambda resource: True
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def predicate(resource):
+        for check in predicates:
+            if not check(resource):
+                return False
+        return True
+    return predicate
+
+
+def _include_tags_predicate(include_tags: Dict[str, List[str]]) -> Callable[[Dict], bool]:
+    required = {key: frozenset(values) for key, values in include_tags.items()}
+
+    def has_required_tags(resource):
+        tags = {tag['Key']: tag['Value'] for tag in resource.get('Tags', ())}
+        for key, values in required.items():
+            if key not in tags or (values and tags[key] not in values):
+                return False
+        return True
+    return has_required_tags
+
+
+def _exclude_tags_predicate(exclude_tags: Dict[str, List[str]]) -> Callable[[Dict], bool]:
+    # Tag keys are matched case-insensitively; an empty value list excludes
+    # the key with any value. Tags are walked once regardless of how many
+    # exclusions there are.
+    any_value = frozenset(key.lower() for key, values in exclude_tags.items() if not values)
+    by_value = {key.lower(): frozenset(values) for key, values in exclude_tags.items() if values}
+
+    def has_no_excluded_tags(resource):
+        for tag in resource.get('Tags', ()):
+            key = tag['Key'].lower()
+            if key in any_value:
+                return False
+            values = by_value.get(key)
+            if values and tag['Value'] in values:
+                return False
+        return True
+    return has_no_excluded_tags
+
+
+def compile_policy(resource_type: str, policy: Dict, now: Optional[datetime] = None) -> CompiledPolicy:
+    """
+    Compile a declarative policy into describe filters and predicates
+    """
+    if resource_type not in RESOURCE_FIELDS:
+        raise PolicyError(f"Unknown resource type: {resource_type}")
+
+    validate_policy(resource_type, policy)
+
+    fields = RESOURCE_FIELDS[resource_type]
+    now = now or datetime.now(timezone.utc)
+    filters = []
+    pushed_predicates = []
+    residual_predicates = []
+
+    def condition(predicate, filter_entry=None):
+        # Pushed conditions are skipped for live results, but still needed
+        # for inventory items
+        if filter_entry is not None:
+            filters.append(filter_entry)
+            pushed_predicates.append(predicate)
+        else:
+            residual_predicates.append(predicate)
+
+    if policy.get('state'):
+        if not fields['state']:
+            raise PolicyError(f"{resource_type} policies don't support 'state'")
+        states = frozenset(policy['state'])
+        get_state = fields['state']
+        condition(
+            lambda resource: get_state(resource) in states,
+            {'Name': fields['state_filter'], 'Values': list(states)}
+        )
+
+    if policy.get('types'):
+        if not fields['type']:
+            raise PolicyError(f"{resource_type} policies don't support 'types'")
+        types = frozenset(policy['types'])
+        type_field = fields['type']
+        condition(
+            lambda resource: resource.get(type_field) in types,
+            {'Name': fields['type_filter'], 'Values': list(types)}
+        )
+
+    # Tags with required values map to tag:<key> filters and a single
+    # key-only tag maps to tag-key; EC2 ORs values within one filter, so
+    # several key-only tags have to be checked locally
+    include_tags = policy.get('include_tags') or {}
+    if include_tags:
+        predicate = _include_tags_predicate(include_tags)
+        if sum(1 for values in include_tags.values() if not values) <= 1:
+            pushed_predicates.append(predicate)
+            for key, values in include_tags.items():
+                if values:
+                    filters.append({'Name': f'tag:{key}', 'Values': list(values)})
+                else:
+                    filters.append({'Name': 'tag-key', 'Values': [key]})
+        else:
+            residual_predicates.append(predicate)
+
+    if policy.get('associated') is not None:
+        if resource_type != 'address':
+            raise PolicyError("Only address policies support 'associated'")
+        associated = bool(policy['associated'])
+        condition(lambda resource: ('AssociationId' in resource) == associated)
+
+    if policy.get('min_age_days') is not None:
+        if not fields['created']:
+            raise PolicyError(f"{resource_type} policies don't support 'min_age_days'")
+        cutoff = now - timedelta(days=policy['min_age_days'])
+        created_field = fields['created']
+        condition(lambda resource: resource[created_field] < cutoff)
+
+    for key, compare in (('min_size_gb', lambda size, limit: size >= limit),
+                         ('max_size_gb', lambda size, limit: size <= limit)):
+        if policy.get(key) is not None:
+            if not fields['size']:
+                raise PolicyError(f"{resource_type} policies don't support '{key}'")
+            limit = policy[key]
+            size_field = fields['size']
+            condition(lambda resource, limit=limit, compare=compare: compare(resource.get(size_field, 0), limit))
+
+    # Walking tags is the most expensive local check, so it goes last
+    if policy.get('exclude_tags'):
+        condition(_exclude_tags_predicate(policy['exclude_tags']))
+
+    metric_conditions = policy.get('metrics') or {}
+    if metric_conditions and resource_type != 'instance':
+        raise PolicyError("Only instance policies support 'metrics'")
+
+    return CompiledPolicy(
+        resource_type,
+        filters,
+        matches=_all(pushed_predicates + residual_predicates),
+        residual=_all(residual_predicates),
+        metric_conditions=metric_conditions
+    )
+
+
+def _narrow_tags(current: Dict[str, List[str]], override: Dict[str, List[str]], exclude: bool) -> Dict[str, List[str]]:
+    # An empty value list means "any value"
+    tags = dict(current)
+    for key, values in override.items():
+        if key not in tags:
+            tags[key] = list(values)
+        elif exclude:
+            # Excluding either set of values excludes their union
+            tags[key] = [] if not values or not tags[key] else sorted(set(tags[key]) | set(values))
+        elif not tags[key] or not values:
+            tags[key] = list(tags[key] or values)
+        else:
+            narrowed = sorted(set(tags[key]) & set(values))
+            if not narrowed:
+                raise PolicyError(f"include_tags override for '{key}' doesn't overlap the default values")
+            tags[key] = narrowed
+    return tags
+
+
+def _narrow_metrics(current: Dict[str, Dict], override: Dict[str, Dict]) -> Dict[str, Dict]:
+    metrics = {metric: dict(condition) for metric, condition in current.items()}
+    for metric, condition in override.items():
+        if metric not in metrics:
+            metrics[metric] = dict(condition)
+            continue
+        # Keep the stricter threshold and the longer window
+        merged = metrics[metric]
+        if 'below' in condition:
+            merged['below'] = min(merged.get('below', condition['below']), condition['below'])
+        if 'above' in condition:
+            merged['above'] = max(merged.get('above', condition['above']), condition['above'])
+        if 'days' in condition:
+            merged['days'] = max(merged.get('days', 7), condition['days'])
+    return metrics
+
+
+def _narrow(resource_type: str, key: str, current, override):
+    if key in LIST_KEYS:
+        narrowed = [value for value in current if value in override]
+        if not narrowed:
+            raise PolicyError(f"{resource_type} '{key}' override {override} doesn't overlap the default {current}")
+        return narrowed
+    if key in ('min_age_days', 'min_size_gb'):
+        return max(current, override)
+    if key == 'max_size_gb':
+        return min(current, override)
+    if key == 'associated':
+        if current != override:
+            raise PolicyError(f"{resource_type} 'associated' can't be overridden")
+        return current
+    if key in TAG_KEYS:
+        return _narrow_tags(current, override, exclude=key == 'exclude_tags')
+    if key == 'metrics':
+        return _narrow_metrics(current, override)
+    raise PolicyError(f"Unknown {resource_type} policy key: {key}")
+
+
+def merge_policies(defaults: Dict[str, Dict], overrides: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Apply per resource type overrides on top of the default policies.
+    Every override condition is ANDed with the default one, so teams can
+    add exclusions and stricter limits but can never widen what a finding
+    category selects (e.g. drop the state or metric conditions).
+    """
+    merged = {resource_type: dict(policy) for resource_type, policy in defaults.items()}
+
+    for resource_type, policy in overrides.items():
+        if resource_type not in RESOURCE_FIELDS:
+            raise PolicyError(f"Unknown resource type: {resource_type}")
+        validate_policy(resource_type, policy)
+
+        base = merged.setdefault(resource_type, {})
+        for key, value in policy.items():
+            if value is None:
+                continue
+            if base.get(key) is None:
+                base[key] = value
+            else:
+                base[key] = _narrow(resource_type, key, base[key], value)
+
+    return merged
+
+
+def compile_policies(policies: Dict[str, Dict], now: Optional[datetime] = None) -> Dict[str, CompiledPolicy]:
+    """
+    Compile policies for every resource type
+    """
+    return {
+        resource_type: compile_policy(resource_type, policy, now)
+        for resource_type, policy in policies.items()
+    }
+
+
+def load_policy_document(body: str) -> Dict[str, Dict]:
+    """
+    Parse a JSON policy document
+    """
+    document = json.loads(body)
+    if not isinstance(document, dict):
+        raise PolicyError("Policy document must be a JSON object keyed by resource type")
+    return document
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resource_costs (
+    resource_id  TEXT NOT NULL,
+    service      TEXT NOT NULL,
+    usage_type   TEXT NOT NULL,
+    cost         REAL NOT NULL,
+    usage_amount REAL NOT NULL,
+    PRIMARY KEY (resource_id, service, usage_type)
+) WITHOUT ROWID;
+"""
+
+UPSERT = """
+INSERT INTO resource_costs (resource_id, service, usage_type, cost, usage_amount)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (resource_id, service, usage_type) DO UPDATE SET
+    cost = cost + excluded.cost,
+    usage_amount = usage_amount + excluded.usage_amount
+"""
+
+
+def normalize_resource_id(resource_id: str) -> str:
+    """
+    CUR reports some EC2 resources (e.g. snapshots) by ARN; store them by
+    resource ID so they can be looked up like instances and volumes
+    """
+    if resource_id.startswith('arn:aws:ec2:') and '/' in resource_id:
+        return resource_id.rsplit('/', 1)[1]
+    return resource_id
+
+
+def cost_store_key(billing_period: str) -> str:
+    """
+    S3 key of the aggregated store for a billing period (YYYY-MM)
+    """
+    year, month = billing_period.split('-')
+    return f"cur-aggregates/{year}/{month}/resource-costs.db"
+
+
+def download_cost_store(s3_client, bucket: str, billing_period: str, path: Optional[str] = None) -> Optional['CostStore']:
+    """
+    Download the aggregated store for a billing period, if it exists
+    """
+    path = path or f"/tmp/resource-costs-{billing_period}.db"
+
+    try:
+        s3_client.download_file(bucket, cost_store_key(billing_period), path)
+    except Exception as e:
+        print(f"No cost store for {billing_period}: {str(e)}")
+        return None
+
+    return CostStore(path)
+
+
+class CostStore:
+    """
+    Compact SQLite store of CUR costs aggregated by resource ID, service
+    and usage type
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def add(self, aggregates: Dict[Tuple[str, str, str], List[float]]):
+        """
+        Merge a chunk of {(resource_id, service, usage_type): [cost, usage]}
+        aggregates into the store
+        """
+        with self.conn:
+            self.conn.executemany(
+                UPSERT,
+                ((normalize_resource_id(resource_id), service, usage_type, cost, usage_amount)
+                 for (resource_id, service, usage_type), (cost, usage_amount) in aggregates.items())
+            )
+
+    def compact(self):
+        """
+        Reclaim free pages before the store is shipped
+        """
+        self.conn.execute('VACUUM')
+
+    def close(self):
+        self.conn.close()
+
+    def cost_for_resources(self, resource_ids: Iterable[str]) -> Dict[str, float]:
+        """
+        Get the total cost of each of the given resources. Resources
+        without CUR line items are left out.
+        """
+        costs = {}
+        ids = list(resource_ids)
+
+        # Stay below SQLite's bound parameter limit
+        for offset in range(0, len(ids), 500):
+            batch = ids[offset:offset + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f"SELECT resource_id, SUM(cost) FROM resource_costs "
+                f"WHERE resource_id IN ({placeholders}) GROUP BY resource_id",
+                batch
+            )
+            costs.update(rows)
+
+        return costs
+
+    def top_resources(self, limit: int = 10, service: Optional[str] = None) -> List[Dict]:
+        """
+        Get the most expensive resources, optionally for a single service
+        """
+        query = (
+            "SELECT resource_id, service, SUM(cost) AS total FROM resource_costs "
+            "WHERE resource_id != ''"
+        )
+        params = []
+        if service:
+            query += " AND service = ?"
+            params.append(service)
+        query += " GROUP BY resource_id, service ORDER BY total DESC LIMIT ?"
+        params.append(limit)
+
+        return [
+            {'resource_id': resource_id, 'service': service_code, 'cost': round(cost, 2)}
+            for resource_id, service_code, cost in self.conn.execute(query, params)
+        ]
+
+    def size_bytes(self) -> int:
+        return os.path.getsize(self.path)
@@ -0,0 +1,329 @@
+import functools
+import json
+import os
+import random
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from replay import Cassette
+
+# Environment variables
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'CostOptimizer')
+# Fraction of invocations that trace peak memory with tracemalloc. Tracing
+# slows allocation-heavy code several times over, so it is off by default.
+MEMORY_SAMPLE_RATE = float(os.environ.get('MEMORY_SAMPLE_RATE', '0'))
+
+# Error codes AWS uses to signal throttling
+THROTTLE_CODES = frozenset([
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'ProvisionedThroughputExceededException',
+    'SlowDown',
+    'LimitExceededException',
+])
+
+# CloudWatch accepts at most 100 values per metric in a single EMF document
+EMF_MAX_VALUES = 100
+
+
+class _Frame:
+    """Bookkeeping for one active phase"""
+    __slots__ = ('name', 'start', 'peak')
+
+    def __init__(self, name: str, start: float):
+        self.name = name
+        self.start = start
+        self.peak = 0
+
+
+class Instrumentation:
+    """
+    Collect per-phase timings, AWS API call statistics and peak memory for a
+    Lambda invocation and emit them as CloudWatch Embedded Metric Format logs
+    """
+
+    def __init__(self, service: str):
+        self.service = service
+        self.function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', service)
+        self._clients = []
+        # Record/replay of API traffic, enabled through CASSETTE_MODE
+        self.cassette = Cassette.from_environment()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear everything recorded by a previous invocation
+        """
+        self.phases: Dict[str, Dict] = {}
+        self.api_calls: Dict[tuple, Dict] = {}
+        self._stack: List[_Frame] = []
+        self._started = time.perf_counter()
+        self.profiling = False
+
+    # ------------------------------------------------------------------
+    # botocore hooks
+    # ------------------------------------------------------------------
+
+    def instrument_clients(self, *clients):
+        """
+        Register botocore event hooks on the given boto3 clients
+        """
+        for client in clients:
+            if client in self._clients:
+                continue
+            events = client.meta.events
+            # before-parameter-build always fires, even when a before-call
+            # handler (stubs, replay) short-circuits the request
+            events.register('before-parameter-build', self._start_call)
+            events.register('after-call', self._after_call)
+            events.register('after-call-error', self._after_call_error)
+            events.register('needs-retry', self._needs_retry)
+            if self.cassette:
+                self.cassette.attach(client)
+            self._clients.append(client)
+
+    def _operation_stats(self, event_name: str) -> Dict:
+        _, service, operation = event_name.split('.', 2)
+        key = (service, operation)
+        stats = self.api_calls.get(key)
+        if stats is None:
+            stats = {
+                'calls': 0,
+                'errors': 0,
+                'retries': 0,
+                'throttles': 0,
+                'latencies': []
+            }
+            self.api_calls[key] = stats
+        return stats
+
+    def _start_call(self, context=None, **kwargs):
+        if context is not None:
+            context['instrumentation_start'] = time.perf_counter()
+
+    def _record_latency(self, stats: Dict, context: Optional[Dict]):
+        stats['calls'] += 1
+        start = (context or {}).get('instrumentation_start')
+        if start is not None:
+            stats['latencies'].append((time.perf_counter() - start) * 1000)
+
+    def _after_call(self, event_name, parsed=None, http_response=None, context=None, **kwargs):
+        stats = self._operation_stats(event_name)
+        self._record_latency(stats, context)
+
+        metadata = (parsed or {}).get('ResponseMetadata', {})
+        stats['retries'] += metadata.get('RetryAttempts', 0)
+
+        if http_response is not None and http_response.status_code >= 300:
+            stats['errors'] += 1
+
+    def _after_call_error(self, event_name, context=None, **kwargs):
+        stats = self._operation_stats(event_name)
+        self._record_latency(stats, context)
+        stats['errors'] += 1
+
+    def _needs_retry(self, event_name, response=None, **kwargs):
+        if response is None:
+            return None
+
+        _, parsed = response
+        error_code = (parsed or {}).get('Error', {}).get('Code')
+        if error_code in THROTTLE_CODES:
+            self._operation_stats(event_name)['throttles'] += 1
+
+        # Never influence the retry decision itself
+        return None
+
+    # ------------------------------------------------------------------
+    # Phases and memory
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a block of code and record the peak memory allocated inside it
+        """
+        if self.profiling and tracemalloc.is_tracing():
+            if self._stack:
+                parent = self._stack[-1]
+                parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        frame = _Frame(name, time.perf_counter())
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            duration = (time.perf_counter() - frame.start) * 1000
+
+            if self.profiling and tracemalloc.is_tracing():
+                frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent.peak = max(parent.peak, frame.peak)
+                tracemalloc.reset_peak()
+
+            stats = self.phases.setdefault(name, {'count': 0, 'duration': 0.0, 'peak': 0})
+            stats['count'] += 1
+            stats['duration'] += duration
+            stats['peak'] = max(stats['peak'], frame.peak)
+
+    def traced(self, name: Optional[str] = None):
+        """
+        Decorator that runs the wrapped function inside a phase
+        """
+        def decorator(func):
+            phase_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.phase(phase_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def handler(self, func):
+        """
+        Decorator for lambda_handler: resets state, traces the whole
+        invocation and flushes metrics even when the handler raises
+        """
+        @functools.wraps(func)
+        def wrapper(event, context):
+            self.reset()
+            if self.cassette:
+                self.cassette.reset()
+            if context is not None and getattr(context, 'function_name', None):
+                self.function_name = context.function_name
+
+            started_tracing = False
+            self.profiling = random.random() < MEMORY_SAMPLE_RATE
+            if self.profiling and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+
+            try:
+                with self.phase('total'):
+                    return func(event, context)
+            finally:
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Error emitting metrics: {str(e)}")
+                if started_tracing:
+                    tracemalloc.stop()
+                if self.cassette and self.cassette.mode == 'record':
+                    try:
+                        self.cassette.save()
+                    except Exception as e:
+                        print(f"Error saving cassette: {str(e)}")
+        return wrapper
+
+    # ------------------------------------------------------------------
+    # EMF output
+    # ------------------------------------------------------------------
+
+    def _emf(self, dimensions: Dict[str, str], metrics: Dict[str, tuple], properties: Optional[Dict] = None) -> Dict:
+        document = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [list(dimensions.keys())],
+                    'Metrics': [
+                        {'Name': metric, 'Unit': unit}
+                        for metric, (unit, _) in metrics.items()
+                    ]
+                }]
+            }
+        }
+        document.update(dimensions)
+        document.update(properties or {})
+        for metric, (_, value) in metrics.items():
+            document[metric] = value
+        return document
+
+    def build_documents(self) -> List[Dict]:
+        """
+        Render everything recorded so far as EMF documents
+        """
+        documents = []
+        total_calls = 0
+        total_retries = 0
+        total_throttles = 0
+
+        for name, stats in self.phases.items():
+            metrics = {
+                'PhaseDuration': ('Milliseconds', round(stats['duration'], 3)),
+                'PhaseCount': ('Count', stats['count'])
+            }
+            if self.profiling:
+                metrics['PhasePeakMemory'] = ('Bytes', stats['peak'])
+            documents.append(self._emf(
+                {'Function': self.function_name, 'Phase': name},
+                metrics
+            ))
+
+        for (service, operation), stats in self.api_calls.items():
+            total_calls += stats['calls']
+            total_retries += stats['retries']
+            total_throttles += stats['throttles']
+
+            dimensions = {
+                'Function': self.function_name,
+                'Service': service,
+                'Operation': operation
+            }
+            latencies = [round(value, 3) for value in stats['latencies']]
+            metrics = {
+                'ApiCalls': ('Count', stats['calls']),
+                'ApiErrors': ('Count', stats['errors']),
+                'ApiRetries': ('Count', stats['retries']),
+                'ApiThrottles': ('Count', stats['throttles'])
+            }
+            if latencies:
+                metrics['ApiLatency'] = ('Milliseconds', latencies[:EMF_MAX_VALUES])
+            documents.append(self._emf(
+                dimensions,
+                metrics,
+                {'ApiLatencyTotal': round(sum(latencies), 3)}
+            ))
+            # Remaining latency samples go out in separate documents so
+            # percentiles stay accurate for high-volume operations
+            for offset in range(EMF_MAX_VALUES, len(latencies), EMF_MAX_VALUES):
+                documents.append(self._emf(
+                    dimensions,
+                    {'ApiLatency': ('Milliseconds', latencies[offset:offset + EMF_MAX_VALUES])}
+                ))
+
+        summary = {
+            'Duration': ('Milliseconds', round((time.perf_counter() - self._started) * 1000, 3)),
+            'ApiCalls': ('Count', total_calls),
+            'ApiRetries': ('Count', total_retries),
+            'ApiThrottles': ('Count', total_throttles),
+            # ru_maxrss is reported in kilobytes on Linux
+            'MaxRss': ('Bytes', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+        }
+        if self.profiling and tracemalloc.is_tracing():
+            summary['PeakMemory'] = ('Bytes', max(
+                [stats['peak'] for stats in self.phases.values()] +
+                [tracemalloc.get_traced_memory()[1]]
+            ))
+        documents.append(self._emf({'Function': self.function_name}, summary))
+
+        return documents
+
+    def flush(self):
+        """
+        Print EMF documents to stdout, where the Lambda log agent picks them up
+        """
+        for document in self.build_documents():
+            print(json.dumps(document))
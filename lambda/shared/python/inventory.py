@@ -0,0 +1,295 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+META_ID = '__meta__'
+RESOURCE_TYPE_INDEX = 'resource_type-index'
+
+# Resource type -> describe settings and the fields kept in the inventory
+RESOURCE_TYPES = {
+    'instance': {
+        'id_field': 'InstanceId',
+        'id_filter': 'instance-id',
+        'fields': ('InstanceId', 'InstanceType', 'LaunchTime', 'State', 'BlockDeviceMappings', 'Tags'),
+        'terminal_states': ('terminated',)
+    },
+    'volume': {
+        'id_field': 'VolumeId',
+        'id_filter': 'volume-id',
+        'fields': ('VolumeId', 'Size', 'VolumeType', 'CreateTime', 'State', 'Attachments', 'Tags'),
+        'terminal_states': ('deleting', 'deleted')
+    },
+    'snapshot': {
+        'id_field': 'SnapshotId',
+        'id_filter': 'snapshot-id',
+        'fields': ('SnapshotId', 'VolumeId', 'VolumeSize', 'StartTime', 'State', 'Description', 'Tags'),
+        'terminal_states': ()
+    },
+    'address': {
+        'id_field': 'AllocationId',
+        'id_filter': 'allocation-id',
+        'fields': ('AllocationId', 'PublicIp', 'Domain', 'AssociationId', 'InstanceId', 'Tags'),
+        'terminal_states': ()
+    }
+}
+
+# Resource ID prefix -> resource type
+ID_PREFIXES = {
+    'i-': 'instance',
+    'vol-': 'volume',
+    'snap-': 'snapshot',
+    'eipalloc-': 'address'
+}
+
+# Fields restored to datetimes when items are loaded
+DATETIME_FIELDS = ('LaunchTime', 'CreateTime', 'StartTime')
+
+# Filter values accepted per describe call
+FILTER_BATCH_SIZE = 200
+
+
+def resource_type_for_id(resource_id: str) -> Optional[str]:
+    """
+    Infer the resource type from an EC2 resource ID
+    """
+    for prefix, resource_type in ID_PREFIXES.items():
+        if resource_id.startswith(prefix):
+            return resource_type
+    return None
+
+
+def describe(ec2_client, resource_type: str, filters: Optional[List[Dict]] = None) -> Iterator[Dict]:
+    """
+    Describe all resources of a type, following pagination
+    """
+    filters = filters or []
+
+    if resource_type == 'instance':
+        paginator = ec2_client.get_paginator('describe_instances')
+        for page in paginator.paginate(Filters=filters):
+            for reservation in page['Reservations']:
+                yield from reservation['Instances']
+
+    elif resource_type == 'volume':
+        paginator = ec2_client.get_paginator('describe_volumes')
+        for page in paginator.paginate(Filters=filters):
+            yield from page['Volumes']
+
+    elif resource_type == 'snapshot':
+        paginator = ec2_client.get_paginator('describe_snapshots')
+        for page in paginator.paginate(OwnerIds=['self'], Filters=filters):
+            yield from page['Snapshots']
+
+    elif resource_type == 'address':
+        # DescribeAddresses is not paginated
+        yield from ec2_client.describe_addresses(Filters=filters)['Addresses']
+
+    else:
+        raise ValueError(f"Unknown resource type: {resource_type}")
+
+
+class Inventory:
+    """
+    Persistent EC2 resource inventory backed by DynamoDB. Items keep the
+    shape of the describe_* responses so cleanup code can evaluate them the
+    same way as live API results.
+    """
+
+    def __init__(self, table_name: str, ec2_client, dynamodb=None):
+        self.table = (dynamodb or boto3.resource('dynamodb')).Table(table_name)
+        self.ec2_client = ec2_client
+
+    @property
+    def client(self):
+        """
+        Low-level DynamoDB client, e.g. for instrumentation
+        """
+        return self.table.meta.client
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def _to_item(self, resource_type: str, resource: Dict) -> Dict:
+        settings = RESOURCE_TYPES[resource_type]
+        data = {field: resource[field] for field in settings['fields'] if field in resource}
+        return {
+            'resource_id': resource[settings['id_field']],
+            'resource_type': resource_type,
+            'data': json.dumps(data, default=str, separators=(',', ':')),
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }
+
+    def _from_item(self, item: Dict) -> Dict:
+        resource = json.loads(item['data'])
+        for field in DATETIME_FIELDS:
+            if field in resource:
+                resource[field] = datetime.fromisoformat(resource[field])
+        return resource
+
+    def _is_terminal(self, resource_type: str, resource: Dict) -> bool:
+        state = resource.get('State')
+        if isinstance(state, dict):
+            state = state.get('Name')
+        return state in RESOURCE_TYPES[resource_type]['terminal_states']
+
+    # ------------------------------------------------------------------
+    # Reads and writes
+    # ------------------------------------------------------------------
+
+    def load(self, resource_type: str) -> Iterator[Dict]:
+        """
+        Yield all inventory items of a resource type, one query page at a time
+        """
+        kwargs = {
+            'IndexName': RESOURCE_TYPE_INDEX,
+            'KeyConditionExpression': Key('resource_type').eq(resource_type)
+        }
+
+        while True:
+            response = self.table.query(**kwargs)
+            for item in response['Items']:
+                yield self._from_item(item)
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def get(self, resource_id: str) -> Optional[Dict]:
+        item = self.table.get_item(Key={'resource_id': resource_id}).get('Item')
+        return self._from_item(item) if item else None
+
+    def put(self, resource_type: str, resource: Dict):
+        self.table.put_item(Item=self._to_item(resource_type, resource))
+
+    def delete(self, resource_id: str):
+        self.table.delete_item(Key={'resource_id': resource_id})
+
+    def refresh(self, resource_type: str, resource_ids: Iterable[str]) -> int:
+        """
+        Re-describe specific resources and apply their current state.
+        Resources that no longer exist are removed. Returns the number of
+        items written or removed.
+        """
+        settings = RESOURCE_TYPES[resource_type]
+        ids = list(dict.fromkeys(resource_ids))
+        changes = 0
+
+        for offset in range(0, len(ids), FILTER_BATCH_SIZE):
+            batch = ids[offset:offset + FILTER_BATCH_SIZE]
+            found = set()
+
+            for resource in describe(self.ec2_client, resource_type,
+                                     [{'Name': settings['id_filter'], 'Values': batch}]):
+                resource_id = resource[settings['id_field']]
+                found.add(resource_id)
+                if self._is_terminal(resource_type, resource):
+                    self.delete(resource_id)
+                else:
+                    self.put(resource_type, resource)
+                changes += 1
+
+            for resource_id in set(batch) - found:
+                self.delete(resource_id)
+                changes += 1
+
+        return changes
+
+    def refresh_attached_volumes(self, instance_id: str) -> int:
+        """
+        Refresh the volumes of an instance that is stopping or going away.
+        Volumes kept on termination (DeleteOnTermination false) become
+        available without an event of their own, and are already detached
+        by then, so the volume IDs stored with the instance are refreshed
+        along with anything still attached.
+        """
+        volume_ids = set()
+        instance = self.get(instance_id)
+        if instance:
+            for mapping in instance.get('BlockDeviceMappings', []):
+                if 'Ebs' in mapping:
+                    volume_ids.add(mapping['Ebs']['VolumeId'])
+
+        for volume in describe(self.ec2_client, 'volume',
+                               [{'Name': 'attachment.instance-id', 'Values': [instance_id]}]):
+            volume_ids.add(volume['VolumeId'])
+
+        return self.refresh('volume', volume_ids)
+
+    def refresh_all(self, resource_type: str) -> int:
+        """
+        Re-describe every resource of a type, replacing its inventory items.
+        Returns the number of live resources.
+        """
+        settings = RESOURCE_TYPES[resource_type]
+        known = {
+            item['resource_id'] for item in self._scan_ids(resource_type)
+        }
+        count = 0
+
+        with self.table.batch_writer(overwrite_by_pkeys=['resource_id']) as batch:
+            for resource in describe(self.ec2_client, resource_type):
+                resource_id = resource[settings['id_field']]
+                known.discard(resource_id)
+                if self._is_terminal(resource_type, resource):
+                    batch.delete_item(Key={'resource_id': resource_id})
+                    continue
+                batch.put_item(Item=self._to_item(resource_type, resource))
+                count += 1
+
+            # Anything left was deleted without us seeing the event
+            for resource_id in known:
+                batch.delete_item(Key={'resource_id': resource_id})
+
+        return count
+
+    def _scan_ids(self, resource_type: str) -> List[Dict]:
+        items = []
+        kwargs = {
+            'IndexName': RESOURCE_TYPE_INDEX,
+            'KeyConditionExpression': Key('resource_type').eq(resource_type),
+            'ProjectionExpression': 'resource_id'
+        }
+
+        while True:
+            response = self.table.query(**kwargs)
+            items.extend(response['Items'])
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        return items
+
+    # ------------------------------------------------------------------
+    # Reconciliation
+    # ------------------------------------------------------------------
+
+    def last_reconciled(self) -> Optional[datetime]:
+        item = self.table.get_item(Key={'resource_id': META_ID}).get('Item')
+        if not item or 'last_reconciled' not in item:
+            return None
+        return datetime.fromisoformat(item['last_reconciled'])
+
+    def needs_reconcile(self, interval_days: int) -> bool:
+        last = self.last_reconciled()
+        return last is None or datetime.now(timezone.utc) - last >= timedelta(days=interval_days)
+
+    def reconcile(self, resource_types: Iterable[str] = RESOURCE_TYPES) -> Dict[str, int]:
+        """
+        Full rescan that repairs drift from missed events. Returns the
+        number of live resources by type.
+        """
+        counts = {
+            resource_type: self.refresh_all(resource_type)
+            for resource_type in resource_types
+        }
+
+        self.table.put_item(Item={
+            'resource_id': META_ID,
+            'resource_type': META_ID,
+            'last_reconciled': datetime.now(timezone.utc).isoformat()
+        })
+
+        return counts
@@ -0,0 +1,391 @@
+import argparse
+import base64
+import cProfile
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from botocore.response import StreamingBody
+
+# Environment variables
+CASSETTE_MODE = os.environ.get('CASSETTE_MODE', '').lower()
+CASSETTE_PATH = os.environ.get('CASSETTE_PATH', '')
+CASSETTE_LATENCY_SCALE = float(os.environ.get('CASSETTE_LATENCY_SCALE', '1.0'))
+
+CASSETTE_VERSION = 1
+
+ACCOUNT_ID_PATTERN = re.compile(r'(?<!\d)\d{12}(?!\d)')
+TIMESTAMP_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+# Lambda runtime variables never written to a cassette; what remains is the
+# function configuration the handler needs to run offline
+ENV_DENYLIST = frozenset([
+    'AWS_ACCESS_KEY', 'AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN',
+    'AWS_REGION', 'AWS_DEFAULT_REGION', 'AWS_EXECUTION_ENV',
+    'TZ', 'LANG', 'PATH', 'LD_LIBRARY_PATH', 'PYTHONPATH'
+])
+ENV_DENY_PREFIXES = ('_', 'LAMBDA_', 'AWS_LAMBDA_', 'AWS_XRAY_', 'AWS_CONTAINER_', 'CASSETTE_')
+
+
+class ReplayMissError(Exception):
+    """Raised when a replayed handler makes a call the cassette doesn't have"""
+
+
+class _ReplayResponse:
+    """Minimal stand-in for the botocore HTTP response of a replayed call"""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers = {}
+        self.content = b''
+
+
+# ----------------------------------------------------------------------
+# Serialization and scrubbing
+# ----------------------------------------------------------------------
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, bytes):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if '__datetime__' in value:
+            return datetime.fromisoformat(value['__datetime__'])
+        if '__bytes__' in value:
+            return base64.b64decode(value['__bytes__'])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+class Scrubber:
+    """
+    Replace AWS account IDs with stable placeholders, so the same account
+    maps to the same fake ID throughout a cassette
+    """
+
+    def __init__(self):
+        self.accounts: Dict[str, str] = {}
+
+    def _replace(self, match) -> str:
+        account_id = match.group(0)
+        if account_id not in self.accounts:
+            self.accounts[account_id] = f"{len(self.accounts) + 1:012d}"
+        return self.accounts[account_id]
+
+    def scrub(self, value):
+        if isinstance(value, str):
+            return ACCOUNT_ID_PATTERN.sub(self._replace, value)
+        if isinstance(value, dict):
+            return {self.scrub(key): self.scrub(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.scrub(item) for item in value]
+        return value
+
+
+def request_key(service: str, operation: str, params: Dict) -> str:
+    """
+    Hash a request so recorded and replayed calls match even though
+    account IDs and timestamps (metric windows, cost periods) differ
+    """
+    def normalize(value):
+        if isinstance(value, datetime):
+            return '<time>'
+        if isinstance(value, str):
+            if TIMESTAMP_PATTERN.match(value):
+                return '<time>'
+            return ACCOUNT_ID_PATTERN.sub('<account>', value)
+        if isinstance(value, dict):
+            return {key: normalize(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(item) for item in value]
+        if isinstance(value, bytes):
+            return hashlib.sha1(value).hexdigest()
+        return value
+
+    body = json.dumps([service, operation, normalize(params)], sort_keys=True, default=str)
+    return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Cassette
+# ----------------------------------------------------------------------
+
+class Cassette:
+    """
+    Record botocore calls made by a handler to a gzip JSON lines file, or
+    serve them back offline with the recorded latencies
+    """
+
+    def __init__(self, mode: str, path: str, latency_scale: float = 1.0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+
+        self.mode = mode
+        self.path = path
+        self.latency_scale = latency_scale
+        self.scrubber = Scrubber()
+        self.interactions: List[Dict] = []
+        self.environment: Dict[str, str] = {}
+        self.misses = 0
+        self._clients = []
+        self._by_key: Dict[str, deque] = {}
+        self._by_operation: Dict[tuple, deque] = {}
+
+        if mode == 'replay':
+            self.load()
+
+    @classmethod
+    def from_environment(cls) -> Optional['Cassette']:
+        """
+        Create a cassette from CASSETTE_MODE/CASSETTE_PATH, if set
+        """
+        if not CASSETTE_MODE or not CASSETTE_PATH:
+            return None
+        return cls(CASSETTE_MODE, CASSETTE_PATH, CASSETTE_LATENCY_SCALE)
+
+    def attach(self, *clients):
+        """
+        Register record or replay hooks on the given boto3 clients
+        """
+        for client in clients:
+            if client in self._clients:
+                continue
+            events = client.meta.events
+            events.register('before-parameter-build', self._capture_params)
+            if self.mode == 'record':
+                events.register('after-call', self._record)
+                events.register('after-call-error', self._record_error)
+            else:
+                events.register('before-call', self._replay)
+            self._clients.append(client)
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def _capture_params(self, params=None, context=None, **kwargs):
+        if context is not None:
+            context['cassette_params'] = params or {}
+            context['cassette_start'] = time.perf_counter()
+
+    def _interaction(self, event_name: str, context: Dict) -> Dict:
+        _, service, operation = event_name.split('.', 2)
+        return {
+            'service': service,
+            'operation': operation,
+            'key': request_key(service, operation, context.get('cassette_params', {})),
+            'latency_ms': round((time.perf_counter() - context.get('cassette_start', time.perf_counter())) * 1000, 3)
+        }
+
+    def _record(self, event_name, parsed=None, http_response=None, context=None, **kwargs):
+        interaction = self._interaction(event_name, context or {})
+        response = dict(parsed or {})
+
+        # Streaming bodies can only be read once: keep a copy and hand the
+        # caller a fresh stream over the same bytes
+        for key, value in list(response.items()):
+            if isinstance(value, StreamingBody):
+                data = value.read()
+                parsed[key] = StreamingBody(io.BytesIO(data), len(data))
+                response[key] = {'__stream__': base64.b64encode(data).decode('ascii')}
+
+        interaction['status'] = http_response.status_code if http_response is not None else 200
+        interaction['response'] = self.scrubber.scrub(_encode(response))
+        self.interactions.append(interaction)
+
+    def _record_error(self, event_name, exception=None, context=None, **kwargs):
+        interaction = self._interaction(event_name, context or {})
+        interaction['error'] = self.scrubber.scrub(f"{type(exception).__name__}: {exception}")
+        self.interactions.append(interaction)
+
+    def reset(self):
+        """
+        Drop interactions recorded by a previous invocation
+        """
+        if self.mode == 'record':
+            self.interactions = []
+
+    def save(self):
+        """
+        Write the recorded interactions; s3:// paths are uploaded
+        """
+        # Outside Lambda the environment is arbitrary, so it isn't recorded
+        environment = {}
+        if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+            environment = {
+                key: self.scrubber.scrub(value)
+                for key, value in os.environ.items()
+                if key not in ENV_DENYLIST and not key.startswith(ENV_DENY_PREFIXES)
+            }
+        header = {
+            'version': CASSETTE_VERSION,
+            'recorded_at': datetime.utcnow().isoformat(),
+            'environment': environment
+        }
+
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as stream:
+            for record in [header] + self.interactions:
+                stream.write(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+                stream.write(b'\n')
+
+        if self.path.startswith('s3://'):
+            import boto3  # A separate client, so the upload isn't recorded itself
+            bucket, _, key = self.path[len('s3://'):].partition('/')
+            boto3.client('s3').put_object(Bucket=bucket, Key=key, Body=buffer.getvalue())
+        else:
+            with open(self.path, 'wb') as output:
+                output.write(buffer.getvalue())
+
+        print(f"Cassette saved to {self.path} ({len(self.interactions)} interactions)")
+
+    # ------------------------------------------------------------------
+    # Replaying
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """
+        Read a cassette and index its interactions for replay
+        """
+        if self.path.startswith('s3://'):
+            import boto3
+            bucket, _, key = self.path[len('s3://'):].partition('/')
+            data = boto3.client('s3').get_object(Bucket=bucket, Key=key)['Body'].read()
+        else:
+            with open(self.path, 'rb') as source:
+                data = source.read()
+
+        lines = gzip.decompress(data).splitlines()
+        header = json.loads(lines[0])
+        if header.get('version') != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version: {header.get('version')}")
+
+        self.environment = header.get('environment', {})
+        self.interactions = [json.loads(line) for line in lines[1:] if line]
+
+        for interaction in self.interactions:
+            self._by_key.setdefault(interaction['key'], deque()).append(interaction)
+            operation = (interaction['service'], interaction['operation'])
+            self._by_operation.setdefault(operation, deque()).append(interaction)
+
+    def _next_interaction(self, service: str, operation: str, key: str) -> Optional[Dict]:
+        # Prefer an exact request match, then fall back to recording order
+        # for the operation (e.g. when code changes alter the parameters)
+        for queue in (self._by_key.get(key), self._by_operation.get((service, operation))):
+            while queue:
+                interaction = queue.popleft()
+                if not interaction.get('served'):
+                    interaction['served'] = True
+                    return interaction
+        return None
+
+    def _replay(self, event_name, context=None, **kwargs):
+        _, service, operation = event_name.split('.', 2)
+        key = request_key(service, operation, (context or {}).get('cassette_params', {}))
+        interaction = self._next_interaction(service, operation, key)
+
+        if interaction is None:
+            self.misses += 1
+            raise ReplayMissError(f"No recorded response for {service}.{operation}")
+
+        if self.latency_scale > 0:
+            time.sleep(interaction['latency_ms'] / 1000 * self.latency_scale)
+
+        if 'error' in interaction:
+            raise ConnectionError(f"Replayed error: {interaction['error']}")
+
+        response = _decode(interaction['response'])
+        for field, value in list(response.items()):
+            if isinstance(value, dict) and '__stream__' in value:
+                data = base64.b64decode(value['__stream__'])
+                response[field] = StreamingBody(io.BytesIO(data), len(data))
+
+        return _ReplayResponse(interaction['status']), response
+
+    def summary(self) -> Dict:
+        """
+        Replay statistics: calls served from the cassette, calls the
+        cassette couldn't serve and recorded calls that were never made
+        """
+        served = sum(1 for interaction in self.interactions if interaction.get('served'))
+        return {
+            'recorded': len(self.interactions),
+            'served': served,
+            'unused': len(self.interactions) - served,
+            'misses': self.misses
+        }
+
+
+def main():
+    """
+    Run a handler offline against a recorded cassette, optionally profiled
+    """
+    parser = argparse.ArgumentParser(description='Replay a recorded cassette against a Lambda handler')
+    parser.add_argument('function_dir', help='Lambda function directory, e.g. lambda/resource_cleanup')
+    parser.add_argument('cassette', help='Cassette file recorded with CASSETTE_MODE=record')
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help='Multiply recorded latencies (0 disables sleeping)')
+    parser.add_argument('--event', default='{}', help='JSON event passed to the handler')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Override a recorded environment variable')
+    parser.add_argument('--profile', metavar='FILE', help='Write cProfile stats to FILE')
+    args = parser.parse_args()
+
+    # Configure the environment before the handler module creates its clients
+    with gzip.open(args.cassette, 'rb') as source:
+        header = json.loads(source.readline())
+    os.environ.update(header.get('environment', {}))
+    os.environ.update(dict(override.split('=', 1) for override in args.env))
+    os.environ.update({
+        'CASSETTE_MODE': 'replay',
+        'CASSETTE_PATH': args.cassette,
+        'CASSETTE_LATENCY_SCALE': str(args.latency_scale)
+    })
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'replay')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'replay')
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, os.path.abspath(args.function_dir))
+    handler = importlib.import_module('handler')
+
+    profiler = cProfile.Profile() if args.profile else None
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        result = handler.lambda_handler(json.loads(args.event), None)
+        print(json.dumps(result, indent=2, default=str))
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+        print(f"Replay finished in {time.perf_counter() - started:.2f}s")
+        print(json.dumps(handler.instrumentation.cassette.summary()))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,14 +3,20 @@ import os
 import boto3
 import urllib3
 
+from instrumentation import Instrumentation
+
 # Initialize AWS clients
 secrets_client = boto3.client('secretsmanager')
 http = urllib3.PoolManager()
 
+instrumentation = Instrumentation('slack_notifier')
+instrumentation.instrument_clients(secrets_client)
+
 # Environment variables
 SLACK_SECRET_ARN = os.environ['SLACK_SECRET_ARN']
 
 
+@instrumentation.handler
 def lambda_handler(event, context):
     """
     Send SNS notifications to Slack
@@ -32,12 +38,13 @@ def lambda_handler(event, context):
         slack_payload = format_slack_message(subject, message)
         
         # Send to Slack
-        response = http.request(
-            'POST',
-            webhook_url,
-            body=json.dumps(slack_payload),
-            headers={'Content-Type': 'application/json'}
-        )
+        with instrumentation.phase('post_to_slack'):
+            response = http.request(
+                'POST',
+                webhook_url,
+                body=json.dumps(slack_payload),
+                headers={'Content-Type': 'application/json'}
+            )
         
         print(f"Slack response: {response.status}")
         
@@ -51,6 +58,7 @@ def lambda_handler(event, context):
         raise
 
 
+@instrumentation.traced()
 def get_slack_webhook():
     """
     Retrieve Slack webhook URL from Secrets Manager
@@ -64,6 +72,7 @@ def get_slack_webhook():
         return ''
 
 
+@instrumentation.traced()
 def format_slack_message(subject, message):
     """
     Format message for Slack with blocks for better presentation
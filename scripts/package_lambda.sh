@@ -9,6 +9,12 @@ echo "Packaging Lambda functions..."
 # Create builds directory
 mkdir -p builds
 
+# Package shared layer
+echo "Packaging shared layer..."
+cd lambda/shared
+zip -r ../../builds/shared_layer.zip . -x "*.pyc" -x "*__pycache__/*"
+cd ../..
+
 # Package cost_monitor
 echo "Packaging cost_monitor..."
 cd lambda/cost_monitor
@@ -30,4 +36,18 @@ pip install -r requirements.txt -t .
 zip -r ../../builds/slack_notifier.zip . -x "*.pyc" -x "__pycache__/*"
 cd ../..
 
+# Package inventory_events
+echo "Packaging inventory_events..."
+cd lambda/inventory_events
+pip install -r requirements.txt -t .
+zip -r ../../builds/inventory_events.zip . -x "*.pyc" -x "__pycache__/*"
+cd ../..
+
+# Package cur_ingest
+echo "Packaging cur_ingest..."
+cd lambda/cur_ingest
+pip install -r requirements.txt -t .
+zip -r ../../builds/cur_ingest.zip . -x "*.pyc" -x "__pycache__/*"
+cd ../..
+
 echo "✅ All Lambda functions packaged successfully!"
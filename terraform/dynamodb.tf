@@ -0,0 +1,31 @@
+# Persistent resource inventory maintained from EC2 and CloudTrail events
+resource "aws_dynamodb_table" "resource_inventory" {
+  name         = "${var.project_name}-resource-inventory"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "resource_id"
+  
+  attribute {
+    name = "resource_id"
+    type = "S"
+  }
+  
+  attribute {
+    name = "resource_type"
+    type = "S"
+  }
+  
+  global_secondary_index {
+    name            = "resource_type-index"
+    hash_key        = "resource_type"
+    projection_type = "ALL"
+  }
+  
+  point_in_time_recovery {
+    enabled = true
+  }
+  
+  tags = merge(var.common_tags, {
+    Name    = "Resource Inventory"
+    Purpose = "Track EC2 resources for cleanup"
+  })
+}
@@ -21,6 +21,109 @@ resource "aws_lambda_permission" "allow_eventbridge_cost_monitor" {
   source_arn    = aws_cloudwatch_event_rule.daily_cost_check.arn
 }
 
+# EC2 resource changes for the event-driven inventory
+resource "aws_cloudwatch_event_rule" "ec2_state_changes" {
+  name        = "${var.project_name}-ec2-state-changes"
+  description = "EC2 instance state changes and EBS volume/snapshot notifications"
+  
+  event_pattern = jsonencode({
+    source = ["aws.ec2"]
+    "detail-type" = [
+      "EC2 Instance State-change Notification",
+      "EBS Volume Notification",
+      "EBS Snapshot Notification"
+    ]
+  })
+  
+  tags = var.common_tags
+}
+
+# Requires a CloudTrail trail recording management events
+resource "aws_cloudwatch_event_rule" "ec2_api_calls" {
+  name        = "${var.project_name}-ec2-api-calls"
+  description = "CloudTrail create/attach/detach/delete calls for tracked EC2 resources"
+  
+  event_pattern = jsonencode({
+    source        = ["aws.ec2"]
+    "detail-type" = ["AWS API Call via CloudTrail"]
+    detail = {
+      eventSource = ["ec2.amazonaws.com"]
+      eventName = [
+        "RunInstances",
+        "TerminateInstances",
+        "CreateVolume",
+        "AttachVolume",
+        "DetachVolume",
+        "ModifyVolume",
+        "DeleteVolume",
+        "CreateSnapshot",
+        "CreateSnapshots",
+        "CopySnapshot",
+        "DeleteSnapshot",
+        "AllocateAddress",
+        "AssociateAddress",
+        "DisassociateAddress",
+        "ReleaseAddress",
+        "CreateTags",
+        "DeleteTags"
+      ]
+    }
+  })
+  
+  tags = var.common_tags
+}
+
+resource "aws_cloudwatch_event_target" "inventory_state_changes" {
+  rule      = aws_cloudwatch_event_rule.ec2_state_changes.name
+  target_id = "InventoryEventsLambda"
+  arn       = aws_lambda_function.inventory_events.arn
+}
+
+resource "aws_cloudwatch_event_target" "inventory_api_calls" {
+  rule      = aws_cloudwatch_event_rule.ec2_api_calls.name
+  target_id = "InventoryEventsLambda"
+  arn       = aws_lambda_function.inventory_events.arn
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_inventory_state_changes" {
+  statement_id  = "AllowExecutionFromEventBridgeStateChanges"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.inventory_events.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.ec2_state_changes.arn
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_inventory_api_calls" {
+  statement_id  = "AllowExecutionFromEventBridgeApiCalls"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.inventory_events.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.ec2_api_calls.arn
+}
+
+# Daily CUR ingestion schedule (before the daily cost check)
+resource "aws_cloudwatch_event_rule" "daily_cur_ingest" {
+  name                = "${var.project_name}-daily-cur-ingest"
+  description         = "Trigger CUR ingestion Lambda daily at 7 AM UTC"
+  schedule_expression = "cron(0 7 * * ? *)"
+  
+  tags = var.common_tags
+}
+
+resource "aws_cloudwatch_event_target" "cur_ingest" {
+  rule      = aws_cloudwatch_event_rule.daily_cur_ingest.name
+  target_id = "CurIngestLambda"
+  arn       = aws_lambda_function.cur_ingest.arn
+}
+
+resource "aws_lambda_permission" "allow_eventbridge_cur_ingest" {
+  statement_id  = "AllowExecutionFromEventBridge"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.cur_ingest.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.daily_cur_ingest.arn
+}
+
 # Weekly resource cleanup schedule
 resource "aws_cloudwatch_event_rule" "weekly_cleanup" {
   name                = "${var.project_name}-weekly-cleanup"
@@ -123,6 +123,21 @@ resource "aws_iam_policy" "resource_cleanup_policy" {
         ]
         Resource = "*"
       },
+      {
+        Sid    = "InventoryAccess"
+        Effect = "Allow"
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:BatchWriteItem",
+          "dynamodb:Query"
+        ]
+        Resource = [
+          aws_dynamodb_table.resource_inventory.arn,
+          "${aws_dynamodb_table.resource_inventory.arn}/index/*"
+        ]
+      },
       {
         Sid    = "RDSAccess"
         Effect = "Allow"
@@ -153,6 +168,16 @@ resource "aws_iam_policy" "resource_cleanup_policy" {
           "${aws_s3_bucket.cost_reports.arn}/*"
         ]
       },
+      {
+        # Lets GetObject report a missing policy document as NoSuchKey
+        # instead of AccessDenied
+        Sid    = "S3List"
+        Effect = "Allow"
+        Action = [
+          "s3:ListBucket"
+        ]
+        Resource = aws_s3_bucket.cost_reports.arn
+      },
       {
         Sid    = "SNSPublish"
         Effect = "Allow"
@@ -231,3 +256,147 @@ resource "aws_iam_role_policy_attachment" "slack_notifier_policy_attach" {
   role       = aws_iam_role.lambda_slack_notifier.name
   policy_arn = aws_iam_policy.slack_notifier_policy.arn
 }
+
+# IAM role for Inventory Events Lambda
+resource "aws_iam_role" "lambda_inventory_events" {
+  name = "${var.project_name}-inventory-events-role"
+  
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Action = "sts:AssumeRole"
+      Effect = "Allow"
+      Principal = {
+        Service = "lambda.amazonaws.com"
+      }
+    }]
+  })
+  
+  tags = var.common_tags
+}
+
+resource "aws_iam_policy" "inventory_events_policy" {
+  name        = "${var.project_name}-inventory-events-policy"
+  description = "Policy for inventory events Lambda function"
+  
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Sid    = "EC2Describe"
+        Effect = "Allow"
+        Action = [
+          "ec2:DescribeInstances",
+          "ec2:DescribeVolumes",
+          "ec2:DescribeSnapshots",
+          "ec2:DescribeAddresses"
+        ]
+        Resource = "*"
+      },
+      {
+        Sid    = "InventoryAccess"
+        Effect = "Allow"
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:BatchWriteItem",
+          "dynamodb:Query"
+        ]
+        Resource = [
+          aws_dynamodb_table.resource_inventory.arn,
+          "${aws_dynamodb_table.resource_inventory.arn}/index/*"
+        ]
+      },
+      {
+        Sid    = "CloudWatchLogs"
+        Effect = "Allow"
+        Action = [
+          "logs:CreateLogGroup",
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Resource = "arn:aws:logs:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:log-group:/aws/lambda/${var.project_name}-*"
+      }
+    ]
+  })
+}
+
+resource "aws_iam_role_policy_attachment" "inventory_events_policy_attach" {
+  role       = aws_iam_role.lambda_inventory_events.name
+  policy_arn = aws_iam_policy.inventory_events_policy.arn
+}
+
+# IAM role for CUR Ingestion Lambda
+resource "aws_iam_role" "lambda_cur_ingest" {
+  name = "${var.project_name}-cur-ingest-role"
+  
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Action = "sts:AssumeRole"
+      Effect = "Allow"
+      Principal = {
+        Service = "lambda.amazonaws.com"
+      }
+    }]
+  })
+  
+  tags = var.common_tags
+}
+
+resource "aws_iam_policy" "cur_ingest_policy" {
+  name        = "${var.project_name}-cur-ingest-policy"
+  description = "Policy for CUR ingestion Lambda function"
+  
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Sid    = "CURRead"
+        Effect = "Allow"
+        Action = [
+          "s3:GetObject",
+          "s3:ListBucket"
+        ]
+        Resource = [
+          "arn:aws:s3:::${local.cur_bucket}",
+          "arn:aws:s3:::${local.cur_bucket}/*"
+        ]
+      },
+      {
+        Sid    = "S3Access"
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject"
+        ]
+        Resource = [
+          "${aws_s3_bucket.cost_reports.arn}/cur-aggregates/*"
+        ]
+      },
+      {
+        Sid    = "SNSPublish"
+        Effect = "Allow"
+        Action = [
+          "sns:Publish"
+        ]
+        Resource = aws_sns_topic.cost_alerts.arn
+      },
+      {
+        Sid    = "CloudWatchLogs"
+        Effect = "Allow"
+        Action = [
+          "logs:CreateLogGroup",
+          "logs:CreateLogStream",
+          "logs:PutLogEvents"
+        ]
+        Resource = "arn:aws:logs:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:log-group:/aws/lambda/${var.project_name}-*"
+      }
+    ]
+  })
+}
+
+resource "aws_iam_role_policy_attachment" "cur_ingest_policy_attach" {
+  role       = aws_iam_role.lambda_cur_ingest.name
+  policy_arn = aws_iam_policy.cur_ingest_policy.arn
+}
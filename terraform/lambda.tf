@@ -1,3 +1,10 @@
+# Archive shared Lambda layer code
+data "archive_file" "shared_layer_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda/shared"
+  output_path = "${path.module}/../builds/shared_layer.zip"
+}
+
 # Archive Lambda function code
 data "archive_file" "cost_monitor_zip" {
   type        = "zip"
@@ -17,6 +24,34 @@ data "archive_file" "slack_notifier_zip" {
   output_path = "${path.module}/../builds/slack_notifier.zip"
 }
 
+data "archive_file" "inventory_events_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda/inventory_events"
+  output_path = "${path.module}/../builds/inventory_events.zip"
+}
+
+data "archive_file" "cur_ingest_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../lambda/cur_ingest"
+  output_path = "${path.module}/../builds/cur_ingest.zip"
+}
+
+locals {
+  # CUR is delivered to the reports bucket unless a dedicated bucket is set
+  cur_bucket = var.cur_bucket != "" ? var.cur_bucket : aws_s3_bucket.cost_reports.id
+}
+
+# Shared code (instrumentation) used by all functions
+resource "aws_lambda_layer_version" "shared" {
+  layer_name  = "${var.project_name}-shared"
+  description = "Shared modules for cost optimizer Lambda functions"
+  
+  filename         = data.archive_file.shared_layer_zip.output_path
+  source_code_hash = data.archive_file.shared_layer_zip.output_base64sha256
+  
+  compatible_runtimes = ["python3.11"]
+}
+
 # Cost Monitor Lambda Function
 resource "aws_lambda_function" "cost_monitor" {
   function_name = "${var.project_name}-cost-monitor"
@@ -29,6 +64,7 @@ resource "aws_lambda_function" "cost_monitor" {
   runtime = "python3.11"
   timeout = 300
   memory_size = 512
+  layers  = [aws_lambda_layer_version.shared.arn]
   
   role = aws_iam_role.lambda_cost_monitor.arn
   
@@ -40,6 +76,11 @@ resource "aws_lambda_function" "cost_monitor" {
       SNS_TOPIC_ARN         = aws_sns_topic.cost_alerts.arn
       SLACK_SECRET_ARN      = aws_secretsmanager_secret.slack_webhook.arn
       AWS_ACCOUNT_ID        = data.aws_caller_identity.current.account_id
+      METRICS_NAMESPACE     = var.metrics_namespace
+      MEMORY_SAMPLE_RATE    = tostring(var.memory_sample_rate)
+      SAVINGS_PLAN_DISCOUNT = var.savings_plan_discount
+      CASSETTE_MODE         = var.record_api_traffic ? "record" : ""
+      CASSETTE_PATH         = "s3://${aws_s3_bucket.cost_reports.id}/cassettes/cost-monitor.jsonl.gz"
     }
   }
   
@@ -67,18 +108,26 @@ resource "aws_lambda_function" "resource_cleanup" {
   runtime = "python3.11"
   timeout = 600
   memory_size = 1024
+  layers  = [aws_lambda_layer_version.shared.arn]
   
   role = aws_iam_role.lambda_resource_cleanup.arn
   
   environment {
     variables = {
-      DRY_RUN            = tostring(var.cleanup_dry_run)
-      CLEANUP_ENABLED    = tostring(var.cleanup_enabled)
-      CPU_THRESHOLD      = var.cpu_threshold_percent
-      VOLUME_AGE_DAYS    = var.volume_age_days
-      SNAPSHOT_AGE_DAYS  = var.snapshot_age_days
-      S3_BUCKET          = aws_s3_bucket.cost_reports.id
-      SNS_TOPIC_ARN      = aws_sns_topic.cost_alerts.arn
+      DRY_RUN                 = tostring(var.cleanup_dry_run)
+      CLEANUP_ENABLED         = tostring(var.cleanup_enabled)
+      CPU_THRESHOLD           = var.cpu_threshold_percent
+      VOLUME_AGE_DAYS         = var.volume_age_days
+      SNAPSHOT_AGE_DAYS       = var.snapshot_age_days
+      S3_BUCKET               = aws_s3_bucket.cost_reports.id
+      SNS_TOPIC_ARN           = aws_sns_topic.cost_alerts.arn
+      INVENTORY_TABLE         = aws_dynamodb_table.resource_inventory.name
+      RECONCILE_INTERVAL_DAYS = var.reconcile_interval_days
+      CLEANUP_POLICY_KEY      = var.cleanup_policy_key
+      CASSETTE_MODE           = var.record_api_traffic ? "record" : ""
+      CASSETTE_PATH           = "s3://${aws_s3_bucket.cost_reports.id}/cassettes/resource-cleanup.jsonl.gz"
+      METRICS_NAMESPACE       = var.metrics_namespace
+      MEMORY_SAMPLE_RATE      = tostring(var.memory_sample_rate)
     }
   }
   
@@ -106,12 +155,15 @@ resource "aws_lambda_function" "slack_notifier" {
   runtime = "python3.11"
   timeout = 60
   memory_size = 256
+  layers  = [aws_lambda_layer_version.shared.arn]
   
   role = aws_iam_role.lambda_slack_notifier.arn
   
   environment {
     variables = {
-      SLACK_SECRET_ARN = aws_secretsmanager_secret.slack_webhook.arn
+      SLACK_SECRET_ARN   = aws_secretsmanager_secret.slack_webhook.arn
+      METRICS_NAMESPACE  = var.metrics_namespace
+      MEMORY_SAMPLE_RATE = tostring(var.memory_sample_rate)
     }
   }
   
@@ -126,3 +178,83 @@ resource "aws_cloudwatch_log_group" "slack_notifier" {
   
   tags = var.common_tags
 }
+
+# Inventory Events Lambda Function
+resource "aws_lambda_function" "inventory_events" {
+  function_name = "${var.project_name}-inventory-events"
+  description   = "Apply EC2 and CloudTrail events to the resource inventory"
+  
+  filename         = data.archive_file.inventory_events_zip.output_path
+  source_code_hash = data.archive_file.inventory_events_zip.output_base64sha256
+  
+  handler = "handler.lambda_handler"
+  runtime = "python3.11"
+  timeout = 60
+  memory_size = 256
+  layers  = [aws_lambda_layer_version.shared.arn]
+  
+  role = aws_iam_role.lambda_inventory_events.arn
+  
+  environment {
+    variables = {
+      INVENTORY_TABLE    = aws_dynamodb_table.resource_inventory.name
+      METRICS_NAMESPACE  = var.metrics_namespace
+      MEMORY_SAMPLE_RATE = tostring(var.memory_sample_rate)
+    }
+  }
+  
+  tags = merge(var.common_tags, {
+    Name = "Inventory Events Lambda"
+  })
+}
+
+resource "aws_cloudwatch_log_group" "inventory_events" {
+  name              = "/aws/lambda/${aws_lambda_function.inventory_events.function_name}"
+  retention_in_days = 14
+  
+  tags = var.common_tags
+}
+
+# CUR Ingestion Lambda Function
+resource "aws_lambda_function" "cur_ingest" {
+  function_name = "${var.project_name}-cur-ingest"
+  description   = "Aggregate Cost and Usage Reports into a resource cost store"
+  
+  filename         = data.archive_file.cur_ingest_zip.output_path
+  source_code_hash = data.archive_file.cur_ingest_zip.output_base64sha256
+  
+  handler = "handler.lambda_handler"
+  runtime = "python3.11"
+  timeout = 900
+  memory_size = 1024
+  layers  = [aws_lambda_layer_version.shared.arn]
+  
+  ephemeral_storage {
+    size = 4096
+  }
+  
+  role = aws_iam_role.lambda_cur_ingest.arn
+  
+  environment {
+    variables = {
+      CUR_BUCKET         = local.cur_bucket
+      CUR_PREFIX         = var.cur_prefix
+      CUR_REPORT_NAME    = var.cur_report_name
+      S3_BUCKET          = aws_s3_bucket.cost_reports.id
+      SNS_TOPIC_ARN      = aws_sns_topic.cost_alerts.arn
+      METRICS_NAMESPACE  = var.metrics_namespace
+      MEMORY_SAMPLE_RATE = tostring(var.memory_sample_rate)
+    }
+  }
+  
+  tags = merge(var.common_tags, {
+    Name = "CUR Ingestion Lambda"
+  })
+}
+
+resource "aws_cloudwatch_log_group" "cur_ingest" {
+  name              = "/aws/lambda/${aws_lambda_function.cur_ingest.function_name}"
+  retention_in_days = 14
+  
+  tags = var.common_tags
+}
@@ -23,6 +23,21 @@ output "slack_notifier_function_name" {
   value       = aws_lambda_function.slack_notifier.function_name
 }
 
+output "inventory_events_function_name" {
+  description = "Inventory events Lambda function name"
+  value       = aws_lambda_function.inventory_events.function_name
+}
+
+output "resource_inventory_table" {
+  description = "DynamoDB table holding the resource inventory"
+  value       = aws_dynamodb_table.resource_inventory.name
+}
+
+output "cur_ingest_function_name" {
+  description = "CUR ingestion Lambda function name"
+  value       = aws_lambda_function.cur_ingest.function_name
+}
+
 output "sns_topic_arn" {
   description = "SNS topic ARN for cost alerts"
   value       = aws_sns_topic.cost_alerts.arn
@@ -76,6 +76,70 @@ variable "cost_anomaly_threshold" {
   default     = 100
 }
 
+variable "savings_plan_discount" {
+  description = "Expected Savings Plans discount versus on-demand (0-1) used for commitment recommendations"
+  type        = number
+  default     = 0.28
+
+  validation {
+    condition     = var.savings_plan_discount >= 0 && var.savings_plan_discount < 1
+    error_message = "savings_plan_discount must be at least 0 and less than 1."
+  }
+}
+
+variable "cleanup_policy_key" {
+  description = "S3 key in the reports bucket of the JSON cleanup policy overrides (see cleanup-policy.json.example)"
+  type        = string
+  default     = "config/cleanup-policy.json"
+}
+
+variable "reconcile_interval_days" {
+  description = "Days between full inventory reconciliation scans in the cleanup run"
+  type        = number
+  default     = 7
+}
+
+variable "cur_bucket" {
+  description = "S3 bucket receiving Cost and Usage Reports (defaults to the reports bucket)"
+  type        = string
+  default     = ""
+}
+
+variable "cur_prefix" {
+  description = "S3 prefix of the CUR delivery, including the report name path"
+  type        = string
+  default     = "cur/cost-optimizer"
+}
+
+variable "cur_report_name" {
+  description = "Name of the Cost and Usage Report"
+  type        = string
+  default     = "cost-optimizer"
+}
+
+variable "metrics_namespace" {
+  description = "CloudWatch namespace for embedded metric format (EMF) metrics"
+  type        = string
+  default     = "CostOptimizer"
+}
+
+variable "memory_sample_rate" {
+  description = "Fraction of Lambda invocations (0-1) that trace peak memory per phase with tracemalloc; tracing slows invocations noticeably"
+  type        = number
+  default     = 0
+
+  validation {
+    condition     = var.memory_sample_rate >= 0 && var.memory_sample_rate <= 1
+    error_message = "memory_sample_rate must be between 0 and 1."
+  }
+}
+
+variable "record_api_traffic" {
+  description = "Record AWS API traffic of the cost monitor and cleanup functions to cassettes in the reports bucket for offline replay"
+  type        = bool
+  default     = false
+}
+
 variable "common_tags" {
   description = "Common tags for all resources"
   type        = map(string)
@@ -0,0 +1,49 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Lambda functions import their own modules and the shared layer as top-level modules
+sys.path[:0] = [
+    os.path.join(ROOT, 'lambda', 'shared', 'python'),
+    os.path.join(ROOT, 'lambda', 'cost_monitor'),
+    os.path.join(ROOT, 'lambda', 'cur_ingest'),
+    os.path.join(ROOT, 'lambda', 'resource_cleanup')
+]
+
+# Handlers read their configuration and create boto3 clients at import time
+HANDLER_ENVIRONMENT = {
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'S3_BUCKET': 'cost-reports',
+    'SNS_TOPIC_ARN': 'arn:aws:sns:us-east-1:123456789012:cost-alerts',
+    'INVENTORY_TABLE': 'resource-inventory'
+}
+
+_handlers = {}
+
+
+@pytest.fixture
+def load_handler(monkeypatch):
+    """
+    Import lambda/<function>/handler.py under a unique module name
+    """
+    pytest.importorskip('boto3')
+
+    def load(function: str):
+        if function not in _handlers:
+            for name, value in HANDLER_ENVIRONMENT.items():
+                monkeypatch.setenv(name, value)
+            spec = importlib.util.spec_from_file_location(
+                f'{function}_handler', os.path.join(ROOT, 'lambda', function, 'handler.py')
+            )
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _handlers[function] = module
+        return _handlers[function]
+
+    return load
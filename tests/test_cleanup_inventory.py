@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from policy import compile_policy
+
+NOW = datetime.now(timezone.utc)
+
+
+def volume(volume_id, state='available', age_days=60):
+    return {
+        'VolumeId': volume_id,
+        'Size': 10,
+        'VolumeType': 'gp3',
+        'CreateTime': NOW - timedelta(days=age_days),
+        'State': state
+    }
+
+
+class FakeInventory:
+    def __init__(self, resources=(), error=None, fail_after=None):
+        self.resources = list(resources)
+        self.error = error
+        self.fail_after = fail_after
+        self.loaded = []
+
+    def load(self, resource_type):
+        self.loaded.append(resource_type)
+        for index, resource in enumerate(self.resources):
+            if index == self.fail_after:
+                raise self.error
+            yield resource
+        if self.error and self.fail_after is None:
+            raise self.error
+
+
+@pytest.fixture
+def handler(load_handler):
+    return load_handler('resource_cleanup')
+
+
+@pytest.fixture
+def policy():
+    return compile_policy('volume', {'state': ['available'], 'min_age_days': 30})
+
+
+def test_load_resources_from_inventory(handler, policy, monkeypatch):
+    inventory = FakeInventory([volume('vol-1'), volume('vol-2', state='in-use'), volume('vol-3', age_days=1)])
+    monkeypatch.setattr(handler, 'inventory', inventory)
+
+    resources = handler.load_resources('volume', policy, from_inventory=True)
+    assert inventory.loaded == []
+
+    assert [resource['VolumeId'] for resource in resources] == ['vol-1']
+    assert inventory.loaded == ['volume']
+
+
+def test_load_resources_falls_back_to_live_scan(handler, policy, monkeypatch):
+    monkeypatch.setattr(handler, 'inventory', FakeInventory(error=RuntimeError('table missing')))
+    calls = []
+
+    def describe(ec2_client, resource_type, filters):
+        calls.append((resource_type, filters))
+        return iter([volume('vol-live')])
+
+    monkeypatch.setattr(handler, 'describe', describe)
+
+    resources = list(handler.load_resources('volume', policy, from_inventory=True))
+
+    assert [resource['VolumeId'] for resource in resources] == ['vol-live']
+    assert calls == [('volume', policy.filters)]
+
+
+def test_load_resources_does_not_mix_partial_inventory_with_live_scan(handler, policy, monkeypatch):
+    inventory = FakeInventory([volume('vol-1'), volume('vol-2')], error=RuntimeError('throttled'), fail_after=1)
+    monkeypatch.setattr(handler, 'inventory', inventory)
+
+    resources = handler.load_resources('volume', policy, from_inventory=True)
+
+    assert next(resources)['VolumeId'] == 'vol-1'
+    with pytest.raises(RuntimeError):
+        next(resources)
+
+
+def test_find_unattached_volumes_from_inventory(handler, policy, monkeypatch):
+    monkeypatch.setattr(handler, 'inventory', FakeInventory([volume('vol-1'), volume('vol-2', state='in-use')]))
+
+    findings = handler.find_unattached_volumes(policy, from_inventory=True)
+
+    assert list(findings.ids) == ['vol-1']
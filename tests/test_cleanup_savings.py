@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from findings import AddressFindings, InstanceFindings, SnapshotFindings, VolumeFindings
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def report():
+    volumes = VolumeFindings(NOW)
+    snapshots = SnapshotFindings(NOW)
+    instances = InstanceFindings(NOW)
+    eips = AddressFindings(NOW)
+    for index in range(2):
+        volumes.append({'VolumeId': f'vol-{index:017x}', 'Size': 100, 'VolumeType': 'gp3', 'CreateTime': NOW})
+        snapshots.append({'SnapshotId': f'snap-{index:017x}', 'VolumeSize': 20, 'StartTime': NOW})
+        instances.append({'InstanceId': f'i-{index:017x}', 'InstanceType': 't3.micro', 'LaunchTime': NOW}, 1.0)
+    eips.append({'AllocationId': 'eipalloc-00000000000000000', 'PublicIp': '192.0.2.1', 'Domain': 'vpc'})
+    return {
+        'unattached_volumes': volumes,
+        'old_snapshots': snapshots,
+        'idle_instances': instances,
+        'idle_elastic_ips': eips
+    }
+
+
+def test_savings_from_estimates(load_handler, report):
+    handler = load_handler('resource_cleanup')
+
+    # 200 GB x 0.10 + 40 GB x 0.05 + 3.60 + 2 x 7.50
+    assert handler.calculate_savings(report) == 40.6
+    assert handler.calculate_savings(report, {}) == 40.6
+
+
+def test_savings_prefer_cur_costs(load_handler, report):
+    handler = load_handler('resource_cleanup')
+    resource_costs = {
+        f'vol-{0:017x}': 8.0,
+        f'snap-{1:017x}': 0.4,
+        f'i-{0:017x}': 9.0,
+        'vol-unrelated': 100.0
+    }
+
+    # vol 8.0 + 10.0, snap 1.0 + 0.4, EIP 3.60, instances 9.0 + 7.50
+    assert handler.calculate_savings(report, resource_costs) == 39.5
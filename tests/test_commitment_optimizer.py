@@ -0,0 +1,111 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from commitment_optimizer import get_hourly_eligible_spend, optimize_commitment
+
+END_TIME = datetime(2026, 10, 19, 5, 30)
+FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+class FakeCostExplorer:
+    """Serves hourly results for a time range, a few per page"""
+
+    def __init__(self, first_hour: datetime, amounts, page_size: int = 100):
+        self.results = [
+            {
+                'TimePeriod': {
+                    'Start': (first_hour + timedelta(hours=index)).strftime(FORMAT),
+                    'End': (first_hour + timedelta(hours=index + 1)).strftime(FORMAT)
+                },
+                'Total': {'UnblendedCost': {'Amount': str(amount), 'Unit': 'USD'}},
+                # The whole open billing month is flagged as estimated
+                'Estimated': True
+            }
+            for index, amount in enumerate(amounts)
+        ]
+        self.page_size = page_size
+        self.requests = []
+
+    def get_cost_and_usage(self, **request):
+        self.requests.append(request)
+        start = datetime.strptime(request['TimePeriod']['Start'], FORMAT)
+        end = datetime.strptime(request['TimePeriod']['End'], FORMAT)
+        results = [
+            result for result in self.results
+            if start <= datetime.strptime(result['TimePeriod']['Start'], FORMAT) < end
+        ]
+        offset = int(request.get('NextPageToken', 0))
+        response = {'ResultsByTime': results[offset:offset + self.page_size]}
+        if offset + self.page_size < len(results):
+            response['NextPageToken'] = str(offset + self.page_size)
+        return response
+
+
+def test_known_optimum():
+    usage = np.r_[np.full(300, 10.0), np.full(36, 2.0)]
+
+    recommendation = optimize_commitment(usage, discount=0.28)
+
+    # Covering the 10/h baseline is worth it: 300h of savings outweigh 36h
+    # of partly unused commitment
+    assert recommendation['hourly_commitment'] == pytest.approx(7.2, abs=0.01)
+    assert recommendation['hours_analyzed'] == 336
+    assert recommendation['on_demand_spend'] == pytest.approx(3072.0)
+    assert recommendation['estimated_savings'] == pytest.approx(3072.0 - 7.2 * 336, abs=1.0)
+    assert recommendation['coverage'] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize('discount', [-0.1, 1.0, 1.5])
+def test_discount_range(discount):
+    with pytest.raises(ValueError):
+        optimize_commitment(np.ones(24), discount=discount)
+
+
+@pytest.mark.parametrize('usage', [np.zeros(0), np.zeros(336)])
+def test_no_usage(usage):
+    assert optimize_commitment(usage) is None
+
+
+def test_sweep_is_fast():
+    usage = np.random.default_rng(1).gamma(2.0, 5.0, 336)
+
+    started = time.perf_counter()
+    optimize_commitment(usage, candidates=4000)
+    assert time.perf_counter() - started < 1.0
+
+
+def test_hourly_spend_pages_and_data_lag():
+    first_hour = datetime(2026, 10, 5, 5)
+    client = FakeCostExplorer(first_hour, [1.0] * (14 * 24), page_size=50)
+
+    hourly_spend = get_hourly_eligible_spend(client, END_TIME, days=14, lag_hours=24)
+
+    # Estimated results are used; only the trailing lag is left out
+    assert hourly_spend.size == 13 * 24
+    assert hourly_spend.sum() == pytest.approx(13 * 24)
+    assert client.requests[0]['TimePeriod'] == {'Start': '2026-10-05T05:00:00Z', 'End': '2026-10-18T05:00:00Z'}
+    assert len(client.requests) == 7
+    assert [request.get('NextPageToken') for request in client.requests[1:]] == ['50', '100', '150', '200', '250', '300']
+
+
+def test_hourly_spend_covers_only_returned_span():
+    # Hourly data was enabled five days into the window
+    first_hour = datetime(2026, 10, 10, 5)
+    amounts = [0.0 if index % 24 < 8 else 3.0 for index in range(9 * 24)]
+    client = FakeCostExplorer(first_hour, amounts)
+
+    hourly_spend = get_hourly_eligible_spend(client, END_TIME, days=14, lag_hours=24)
+
+    assert hourly_spend.size == 8 * 24
+    np.testing.assert_array_equal(hourly_spend, amounts[:8 * 24])
+
+
+def test_hourly_spend_without_data():
+    client = FakeCostExplorer(datetime(2026, 10, 5, 5), [])
+
+    assert get_hourly_eligible_spend(client, END_TIME).size == 0
+    assert optimize_commitment(get_hourly_eligible_spend(client, END_TIME)) is None
@@ -0,0 +1,55 @@
+import pytest
+
+from cost_store import CostStore, cost_store_key, normalize_resource_id
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CostStore(str(tmp_path / 'costs.db'))
+    yield store
+    store.close()
+
+
+def test_normalize_resource_id():
+    assert normalize_resource_id('arn:aws:ec2:us-east-1:123456789012:snapshot/snap-0123') == 'snap-0123'
+    assert normalize_resource_id('vol-0123') == 'vol-0123'
+    assert normalize_resource_id('arn:aws:s3:::bucket/key') == 'arn:aws:s3:::bucket/key'
+    assert normalize_resource_id('') == ''
+
+
+def test_cost_store_key():
+    assert cost_store_key('2026-09') == 'cur-aggregates/2026/09/resource-costs.db'
+
+
+def test_cost_for_resources(store):
+    store.add({
+        ('vol-1', 'AmazonEC2', 'EBS:VolumeUsage.gp3'): [8.0, 80.0],
+        ('vol-1', 'AmazonEC2', 'EBS:VolumeIOUsage'): [0.5, 1.0],
+        ('arn:aws:ec2:us-east-1:123456789012:snapshot/snap-1', 'AmazonEC2', 'EBS:SnapshotUsage'): [1.25, 25.0],
+        ('i-1', 'AmazonEC2', 'BoxUsage:t3.micro'): [7.5, 720.0]
+    })
+    # Chunks for the same resource add up
+    store.add({('snap-1', 'AmazonEC2', 'EBS:SnapshotUsage'): [0.25, 5.0]})
+
+    costs = store.cost_for_resources(['vol-1', 'snap-1', 'vol-missing'])
+
+    assert costs == {'vol-1': pytest.approx(8.5), 'snap-1': pytest.approx(1.5)}
+
+
+def test_cost_for_many_resources(store):
+    store.add({(f'vol-{index}', 'AmazonEC2', 'EBS:VolumeUsage'): [float(index), 1.0] for index in range(1200)})
+
+    costs = store.cost_for_resources(f'vol-{index}' for index in range(0, 1300, 2))
+
+    assert len(costs) == 600
+    assert costs['vol-1198'] == 1198.0
+
+
+def test_top_resources(store):
+    store.add({
+        ('i-1', 'AmazonEC2', 'BoxUsage'): [10.0, 1.0],
+        ('i-2', 'AmazonEC2', 'BoxUsage'): [30.0, 1.0],
+        ('', 'AWSLambda', 'Request'): [99.0, 1.0]
+    })
+
+    assert store.top_resources(1) == [{'resource_id': 'i-2', 'service': 'AmazonEC2', 'cost': 30.0}]
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+import pytest
+
+
+@pytest.mark.parametrize('now, periods', [
+    (datetime(2026, 10, 1, 7), ['2026-09', '2026-10']),
+    (datetime(2026, 10, 5, 7), ['2026-09', '2026-10']),
+    (datetime(2026, 10, 6, 7), ['2026-10']),
+    (datetime(2026, 1, 2, 7), ['2025-12', '2026-01'])
+])
+def test_billing_periods(load_handler, now, periods):
+    handler = load_handler('cur_ingest')
+
+    assert handler.get_billing_periods(now) == periods
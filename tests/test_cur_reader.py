@@ -0,0 +1,123 @@
+import gzip
+import os
+import zipfile
+
+import pytest
+
+import cur_reader
+from cost_store import CostStore
+from cur_reader import csv_compression, ingest_file, iter_csv_chunks, iter_parquet_chunks, normalize_column
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'cur-sample.csv.gz')
+
+EXPECTED = {
+    ('i-0123456789abcdef0', 'AmazonEC2', 'BoxUsage:t3.micro'): [0.0208, 2.0],
+    ('vol-0123456789abcdef0', 'AmazonEC2', 'EBS:VolumeUsage.gp3'): [0.08, 1.0],
+    ('cost-reports-bucket', 'AmazonS3', 'TimedStorage-ByteHrs'): [0.23, 10.0],
+    ('i-0fedcba9876543210', 'AmazonEC2', 'BoxUsage:m5.large'): [0.096, 1.0],
+    ('', 'AWSLambda', 'Request'): [0.0, 1000.0]
+}
+
+
+def merge(chunks):
+    merged = {}
+    for chunk in chunks:
+        for key, (cost, usage_amount) in chunk.items():
+            totals = merged.setdefault(key, [0.0, 0.0])
+            totals[0] += cost
+            totals[1] += usage_amount
+    return merged
+
+
+def assert_aggregates(actual):
+    assert actual.keys() == EXPECTED.keys()
+    for key, (cost, usage_amount) in EXPECTED.items():
+        assert actual[key][0] == pytest.approx(cost)
+        assert actual[key][1] == pytest.approx(usage_amount)
+
+
+def test_normalize_column():
+    assert normalize_column('lineItem/ResourceId') == 'line_item_resource_id'
+    assert normalize_column('line_item_resource_id') == 'line_item_resource_id'
+
+
+def test_csv_compression():
+    assert csv_compression('a/report-1.csv.gz') == 'gzip'
+    assert csv_compression('a/report-1.csv.zip') == 'zip'
+    assert csv_compression('a/report-1.csv') is None
+    with pytest.raises(ValueError, match='Unsupported CUR compression'):
+        csv_compression('a/report-1.csv.bz2')
+
+
+def test_iter_csv_chunks():
+    with open(FIXTURE, 'rb') as stream:
+        chunks = list(iter_csv_chunks(stream))
+
+    assert len(chunks) == 1
+    assert_aggregates(chunks[0])
+
+
+def test_iter_csv_chunks_bounds_chunk_size(monkeypatch):
+    monkeypatch.setattr(cur_reader, 'CHUNK_KEYS', 2)
+
+    with open(FIXTURE, 'rb') as stream:
+        chunks = list(iter_csv_chunks(stream))
+
+    assert all(len(chunk) <= 2 for chunk in chunks)
+    assert_aggregates(merge(chunks))
+
+
+def test_iter_csv_chunks_missing_column(tmp_path):
+    path = tmp_path / 'bad.csv'
+    path.write_text('lineItem/ResourceId,lineItem/UnblendedCost\ni-1,1\n')
+
+    with open(path, 'rb') as stream, pytest.raises(ValueError, match='missing a required column'):
+        list(iter_csv_chunks(stream, compressed=False))
+
+
+@pytest.mark.parametrize('suffix', ['.csv.gz', '.csv.zip', '.csv'])
+def test_ingest_file(tmp_path, suffix):
+    with gzip.open(FIXTURE, 'rb') as fixture:
+        raw = fixture.read()
+
+    path = tmp_path / f'report-1{suffix}'
+    if suffix == '.csv.gz':
+        path.write_bytes(gzip.compress(raw))
+    elif suffix == '.csv.zip':
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('report-1.csv', raw)
+    else:
+        path.write_bytes(raw)
+
+    store = CostStore(str(tmp_path / 'costs.db'))
+    # Ingesting twice must add up rather than overwrite
+    assert ingest_file(str(path), store) == 1
+    assert ingest_file(str(path), store) == 1
+
+    top = store.top_resources(2)
+    store.close()
+
+    assert [resource['resource_id'] for resource in top] == ['cost-reports-bucket', 'i-0fedcba9876543210']
+    assert top[0]['cost'] == pytest.approx(0.46)
+
+
+def test_iter_parquet_chunks(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    with open(FIXTURE, 'rb') as stream:
+        rows = iter_csv_chunks(stream)
+        expected = next(rows)
+
+    table = pa.table({
+        'line_item_resource_id': [key[0] for key in expected],
+        'line_item_product_code': [key[1] for key in expected],
+        'line_item_usage_type': [key[2] for key in expected],
+        'line_item_unblended_cost': [totals[0] for totals in expected.values()],
+        'line_item_usage_amount': [totals[1] for totals in expected.values()],
+        'line_item_line_item_type': ['Usage'] * len(expected)
+    })
+    path = tmp_path / 'report-1.parquet'
+    pq.write_table(table, path)
+
+    assert_aggregates(merge(iter_parquet_chunks(str(path))))
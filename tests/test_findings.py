@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from findings import (AddressFindings, FindingTable, IdColumn, InstanceFindings, SnapshotFindings,
+                      StringColumn, VolumeFindings, report_to_dict)
+
+NOW = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+
+def test_id_column_round_trip():
+    ids = ['vol-0123456789abcdef0', 'vol-fedcba98765432101', 'vol-ffffffff', 'N/A', 'vol-ABCDEF01', 'vol-123']
+    column = IdColumn('vol-')
+    for resource_id in ids:
+        column.append(resource_id)
+
+    assert list(column) == ids
+    assert column[-1] == 'vol-123'
+    assert len(column) == len(ids)
+
+
+def test_string_column_round_trip():
+    values = ['Created by AWS Backup', '', 'Créé pour ami-1', 'Created by AWS Backup']
+    column = StringColumn()
+    for value in values:
+        column.append(value)
+
+    assert list(column) == values
+    # Repeated values share their bytes
+    assert len(column.data) == len('Created by AWS Backup') + len('Créé pour ami-1'.encode('utf-8'))
+
+
+def test_finding_table_is_abstract():
+    with pytest.raises(TypeError):
+        FindingTable(NOW)
+
+
+def test_report_shape():
+    instances = InstanceFindings(NOW)
+    instances.append({
+        'InstanceId': 'i-0123456789abcdef0',
+        'InstanceType': 't3.micro',
+        'LaunchTime': NOW - timedelta(days=3),
+        'Tags': [{'Key': 'team', 'Value': 'data'}]
+    }, 1.5)
+
+    volumes = VolumeFindings(NOW)
+    age_days = volumes.append({
+        'VolumeId': 'vol-0123456789abcdef0',
+        'Size': 100,
+        'VolumeType': 'gp3',
+        'CreateTime': NOW - timedelta(days=40, hours=1)
+    })
+
+    snapshots = SnapshotFindings(NOW)
+    snapshots.append({
+        'SnapshotId': 'snap-0123456789abcdef0',
+        'VolumeSize': 8,
+        # Sub-second precision is not kept
+        'StartTime': NOW - timedelta(days=100, microseconds=250000),
+        'Description': 'Created by AWS Backup'
+    })
+
+    addresses = AddressFindings(NOW)
+    addresses.append({'AllocationId': 'eipalloc-0123456789abcdef0', 'PublicIp': '192.0.2.1', 'Domain': 'vpc'})
+
+    report = report_to_dict({
+        'dry_run': True,
+        'idle_instances': instances,
+        'unattached_volumes': volumes,
+        'old_snapshots': snapshots,
+        'idle_elastic_ips': addresses
+    })
+
+    assert age_days == 40
+    assert report['dry_run'] is True
+    assert report['idle_instances'] == [{
+        'instance_id': 'i-0123456789abcdef0',
+        'instance_type': 't3.micro',
+        'avg_cpu': 1.5,
+        'launch_time': '2026-09-28 12:00:00+00:00',
+        'tags': {'team': 'data'}
+    }]
+    assert report['unattached_volumes'] == [{
+        'volume_id': 'vol-0123456789abcdef0',
+        'size': 100,
+        'volume_type': 'gp3',
+        'create_time': '2026-08-22 11:00:00+00:00',
+        'age_days': 40,
+        'tags': {}
+    }]
+    assert report['old_snapshots'] == [{
+        'snapshot_id': 'snap-0123456789abcdef0',
+        'volume_id': 'N/A',
+        'size': 8,
+        'start_time': '2026-06-23 11:59:59+00:00',
+        'age_days': 100,
+        'description': 'Created by AWS Backup'
+    }]
+    assert report['idle_elastic_ips'] == [{
+        'allocation_id': 'eipalloc-0123456789abcdef0',
+        'public_ip': '192.0.2.1',
+        'domain': 'vpc'
+    }]
+
+
+def test_aggregates():
+    volumes = VolumeFindings(NOW)
+    instances = InstanceFindings(NOW)
+    for index, size in enumerate([10, 20, 30]):
+        volumes.append({'VolumeId': f'vol-{index:017x}', 'Size': size, 'VolumeType': 'gp3', 'CreateTime': NOW})
+        instances.append({'InstanceId': f'i-{index:017x}', 'InstanceType': 't3.micro' if index else 'm5.large',
+                          'LaunchTime': NOW}, 0.0)
+
+    assert volumes.total_size() == 60
+    assert instances.type_counts() == {'t3.micro': 2, 'm5.large': 1}
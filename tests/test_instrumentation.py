@@ -0,0 +1,125 @@
+import json
+import tracemalloc
+
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+from botocore.stub import Stubber
+
+import instrumentation as instrumentation_module
+from instrumentation import EMF_MAX_VALUES, Instrumentation
+
+
+@pytest.fixture
+def ec2():
+    client = boto3.client('ec2', region_name='us-east-1',
+                          aws_access_key_id='testing', aws_secret_access_key='testing')
+    with Stubber(client) as stubber:
+        yield client, stubber
+
+
+def emf_documents(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+
+
+def test_api_call_and_error_accounting(ec2):
+    client, stubber = ec2
+    instrumentation = Instrumentation('test')
+    instrumentation.instrument_clients(client)
+
+    stubber.add_response('describe_volumes', {'Volumes': []})
+    stubber.add_response('describe_volumes', {'Volumes': []})
+    stubber.add_client_error('describe_volumes', 'InvalidVolume.NotFound', http_status_code=400)
+    stubber.add_response('describe_snapshots', {'Snapshots': []})
+
+    client.describe_volumes()
+    client.describe_volumes()
+    with pytest.raises(client.exceptions.ClientError):
+        client.describe_volumes()
+    client.describe_snapshots()
+
+    volumes = instrumentation.api_calls[('ec2', 'DescribeVolumes')]
+    assert volumes['calls'] == 3
+    assert volumes['errors'] == 1
+    assert len(volumes['latencies']) == 3
+
+    snapshots = instrumentation.api_calls[('ec2', 'DescribeSnapshots')]
+    assert snapshots['calls'] == 1
+    assert snapshots['errors'] == 0
+
+
+def test_document_shape():
+    instrumentation = Instrumentation('test')
+    with instrumentation.phase('scan'):
+        pass
+
+    documents = instrumentation.build_documents()
+    phase, summary = documents
+
+    assert phase['Phase'] == 'scan'
+    assert phase['PhaseCount'] == 1
+    directive = phase['_aws']['CloudWatchMetrics'][0]
+    assert directive['Dimensions'] == [['Function', 'Phase']]
+    assert {metric['Name'] for metric in directive['Metrics']} == {'PhaseDuration', 'PhaseCount'}
+    # Every metric in the directive has a value in the document
+    for document in documents:
+        for metric in document['_aws']['CloudWatchMetrics'][0]['Metrics']:
+            assert metric['Name'] in document
+
+    assert summary['Function'] == 'test'
+    assert 'MaxRss' in summary and 'PeakMemory' not in summary
+
+
+def test_latencies_split_at_emf_limit():
+    instrumentation = Instrumentation('test')
+    stats = instrumentation._operation_stats('after-call.ec2.DescribeVolumes')
+    stats['calls'] = EMF_MAX_VALUES * 2 + 5
+    stats['latencies'] = [float(index) for index in range(stats['calls'])]
+
+    documents = [
+        document for document in instrumentation.build_documents()
+        if document.get('Operation') == 'DescribeVolumes'
+    ]
+
+    assert [len(document['ApiLatency']) for document in documents] == [EMF_MAX_VALUES, EMF_MAX_VALUES, 5]
+    assert documents[0]['ApiCalls'] == stats['calls']
+    assert all('ApiCalls' not in document for document in documents[1:])
+    assert sum(value for document in documents for value in document['ApiLatency']) == pytest.approx(
+        sum(stats['latencies']), abs=0.01)
+
+
+def test_nested_phase_peak_propagates_to_parent():
+    instrumentation = Instrumentation('test')
+    instrumentation.profiling = True
+    tracemalloc.start()
+    try:
+        with instrumentation.phase('outer'):
+            with instrumentation.phase('inner'):
+                buffer = bytearray(4 * 1024 * 1024)
+                del buffer
+    finally:
+        tracemalloc.stop()
+
+    inner = instrumentation.phases['inner']['peak']
+    outer = instrumentation.phases['outer']['peak']
+    assert inner >= 4 * 1024 * 1024
+    assert outer >= inner
+
+
+def test_flush_runs_when_handler_raises(capsys, monkeypatch):
+    monkeypatch.setattr(instrumentation_module, 'MEMORY_SAMPLE_RATE', 1.0)
+    instrumentation = Instrumentation('test')
+
+    @instrumentation.handler
+    def lambda_handler(event, context):
+        with instrumentation.phase('work'):
+            raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        lambda_handler({}, None)
+
+    documents = emf_documents(capsys)
+    phases = {document['Phase'] for document in documents if 'Phase' in document}
+    assert phases == {'total', 'work'}
+    assert 'PeakMemory' in documents[-1]
+    assert not tracemalloc.is_tracing()
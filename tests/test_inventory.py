@@ -0,0 +1,160 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+from botocore.stub import Stubber  # noqa: E402
+
+from inventory import Inventory, resource_type_for_id  # noqa: E402
+
+LAUNCHED = datetime(2026, 9, 1, 12, 30, tzinfo=timezone.utc)
+
+
+class FakeTable:
+    """In-memory stand-in for the DynamoDB table resource"""
+
+    def __init__(self, items=(), page_size=2):
+        self.items = {item['resource_id']: item for item in items}
+        self.page_size = page_size
+        self.queries = 0
+
+    def query(self, ExclusiveStartKey=None, **kwargs):
+        self.queries += 1
+        items = sorted(self.items.values(), key=lambda item: item['resource_id'])
+        offset = ExclusiveStartKey or 0
+        response = {'Items': items[offset:offset + self.page_size]}
+        if offset + self.page_size < len(items):
+            response['LastEvaluatedKey'] = offset + self.page_size
+        return response
+
+    def get_item(self, Key):
+        item = self.items.get(Key['resource_id'])
+        return {'Item': item} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item['resource_id']] = Item
+
+    def delete_item(self, Key):
+        self.items.pop(Key['resource_id'], None)
+
+
+class FakeDynamoDB:
+    def __init__(self, table):
+        self.table = table
+
+    def Table(self, name):
+        return self.table
+
+
+@pytest.fixture
+def ec2():
+    client = boto3.client('ec2', region_name='us-east-1',
+                          aws_access_key_id='testing', aws_secret_access_key='testing')
+    with Stubber(client) as stubber:
+        yield client, stubber
+        stubber.assert_no_pending_responses()
+
+
+def make_inventory(ec2_client=None, items=()):
+    table = FakeTable(items)
+    return Inventory('inventory', ec2_client, dynamodb=FakeDynamoDB(table)), table
+
+
+def instance(instance_id='i-0123456789abcdef0', volume_ids=('vol-1',)):
+    return {
+        'InstanceId': instance_id,
+        'InstanceType': 't3.micro',
+        'LaunchTime': LAUNCHED,
+        'State': {'Code': 16, 'Name': 'running'},
+        'BlockDeviceMappings': [
+            {'DeviceName': '/dev/xvda', 'Ebs': {'VolumeId': volume_id, 'AttachTime': LAUNCHED,
+                                                'DeleteOnTermination': False, 'Status': 'attached'}}
+            for volume_id in volume_ids
+        ],
+        'Tags': [{'Key': 'team', 'Value': 'data'}],
+        'PrivateIpAddress': '10.0.0.1'
+    }
+
+
+def volume(volume_id, state='available'):
+    return {
+        'VolumeId': volume_id,
+        'Size': 100,
+        'VolumeType': 'gp3',
+        'CreateTime': LAUNCHED,
+        'State': state,
+        'Attachments': [],
+        'AvailabilityZone': 'us-east-1a'
+    }
+
+
+def test_item_round_trip():
+    inventory, _ = make_inventory()
+
+    item = inventory._to_item('instance', instance())
+    resource = inventory._from_item(item)
+
+    assert item['resource_id'] == 'i-0123456789abcdef0'
+    assert item['resource_type'] == 'instance'
+    # Only the configured fields are kept
+    assert 'PrivateIpAddress' not in json.loads(item['data'])
+    assert resource['LaunchTime'] == LAUNCHED
+    assert resource['LaunchTime'].tzinfo is not None
+    assert resource['State'] == {'Code': 16, 'Name': 'running'}
+    assert resource['BlockDeviceMappings'][0]['Ebs']['VolumeId'] == 'vol-1'
+    assert resource['Tags'] == [{'Key': 'team', 'Value': 'data'}]
+
+
+def test_load_pages_lazily():
+    inventory, table = make_inventory()
+    for index in range(5):
+        inventory.put('volume', volume(f'vol-{index}'))
+
+    resources = inventory.load('volume')
+    assert table.queries == 0
+
+    first = next(resources)
+    assert table.queries == 1
+    assert first['VolumeId'] == 'vol-0'
+    assert first['CreateTime'] == LAUNCHED
+
+    assert [resource['VolumeId'] for resource in resources] == ['vol-1', 'vol-2', 'vol-3', 'vol-4']
+    assert table.queries == 3
+
+
+def test_refresh_attached_volumes(ec2):
+    ec2_client, stubber = ec2
+    inventory, table = make_inventory(ec2_client)
+    inventory.put('instance', instance(volume_ids=('vol-kept', 'vol-deleted')))
+    inventory.put('volume', volume('vol-kept', state='in-use'))
+    inventory.put('volume', volume('vol-deleted', state='in-use'))
+
+    stubber.add_response('describe_volumes', {'Volumes': [volume('vol-attached', state='in-use')]}, {
+        'Filters': [{'Name': 'attachment.instance-id', 'Values': ['i-0123456789abcdef0']}]
+    })
+    stubber.add_response('describe_volumes', {
+        'Volumes': [volume('vol-kept'), volume('vol-attached', state='in-use')]
+    })
+
+    changes = inventory.refresh_attached_volumes('i-0123456789abcdef0')
+
+    assert changes == 3
+    assert json.loads(table.items['vol-kept']['data'])['State'] == 'available'
+    assert 'vol-attached' in table.items
+    # Deleted on termination
+    assert 'vol-deleted' not in table.items
+
+
+def test_refresh_attached_volumes_of_unknown_instance(ec2):
+    ec2_client, stubber = ec2
+    inventory, _ = make_inventory(ec2_client)
+    stubber.add_response('describe_volumes', {'Volumes': []})
+
+    assert inventory.refresh_attached_volumes('i-0123456789abcdef0') == 0
+
+
+def test_resource_type_for_id():
+    assert resource_type_for_id('i-0123') == 'instance'
+    assert resource_type_for_id('eipalloc-0123') == 'address'
+    assert resource_type_for_id('eni-0123') is None
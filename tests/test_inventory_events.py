@@ -0,0 +1,112 @@
+import pytest
+
+INSTANCE_ID = 'i-0123456789abcdef0'
+
+
+@pytest.fixture
+def handler(load_handler):
+    return load_handler('inventory_events')
+
+
+def state_change(state):
+    return {
+        'detail-type': 'EC2 Instance State-change Notification',
+        'source': 'aws.ec2',
+        'detail': {'instance-id': INSTANCE_ID, 'state': state}
+    }
+
+
+def cloudtrail(event_name, request=None, response=None, error_code=None):
+    detail = {
+        'eventSource': 'ec2.amazonaws.com',
+        'eventName': event_name,
+        'requestParameters': request,
+        'responseElements': response
+    }
+    if error_code:
+        detail['errorCode'] = error_code
+    return {'detail-type': 'AWS API Call via CloudTrail', 'source': 'aws.ec2', 'detail': detail}
+
+
+def test_running_instance_is_refreshed(handler):
+    assert handler.parse_event(state_change('running')) == ({INSTANCE_ID}, set(), [], set())
+
+
+@pytest.mark.parametrize('state', ['shutting-down', 'stopped'])
+def test_stopping_instance_refreshes_its_volumes(handler, state):
+    assert handler.parse_event(state_change(state)) == ({INSTANCE_ID}, set(), [], {INSTANCE_ID})
+
+
+def test_terminated_instance_is_deleted(handler):
+    assert handler.parse_event(state_change('terminated')) == (set(), {INSTANCE_ID}, [], {INSTANCE_ID})
+
+
+@pytest.mark.parametrize('ebs_event, expected', [
+    ('deleteVolume', (set(), {'vol-0123'}, [], set())),
+    ('createVolume', ({'vol-0123'}, set(), [], set()))
+])
+def test_ebs_volume_notification(handler, ebs_event, expected):
+    event = {
+        'detail-type': 'EBS Volume Notification',
+        'resources': ['arn:aws:ec2:us-east-1:123456789012:volume/vol-0123'],
+        'detail': {'event': ebs_event, 'result': 'available'}
+    }
+
+    assert handler.parse_event(event) == expected
+
+
+def test_cloudtrail_delete(handler):
+    event = cloudtrail('DeleteSnapshot', request={'snapshotId': 'snap-0123'}, response={'_return': True})
+
+    assert handler.parse_event(event) == (set(), {'snap-0123'}, [], set())
+
+
+def test_cloudtrail_attach_refreshes_all_ids(handler):
+    event = cloudtrail('AttachVolume', request={'volumeId': 'vol-0123', 'instanceId': INSTANCE_ID, 'device': '/dev/sdf'})
+
+    assert handler.parse_event(event) == ({'vol-0123', INSTANCE_ID}, set(), [], set())
+
+
+def test_cloudtrail_error_is_ignored(handler):
+    event = cloudtrail('DeleteVolume', request={'volumeId': 'vol-0123'}, error_code='Client.UnauthorizedOperation')
+
+    assert handler.parse_event(event) == (set(), set(), [], set())
+
+
+def test_associate_address_without_allocation_id_rescans(handler):
+    event = cloudtrail('AssociateAddress', request={'publicIp': '192.0.2.1', 'instanceId': INSTANCE_ID},
+                       response={'associationId': 'eipassoc-0123'})
+
+    assert handler.parse_event(event) == ({INSTANCE_ID}, set(), ['address'], set())
+
+
+def test_associate_address_with_allocation_id(handler):
+    event = cloudtrail('AssociateAddress', request={'allocationId': 'eipalloc-0123', 'instanceId': INSTANCE_ID})
+
+    assert handler.parse_event(event) == ({'eipalloc-0123', INSTANCE_ID}, set(), [], set())
+
+
+def test_unsupported_event(handler):
+    assert handler.parse_event({'detail-type': 'Scheduled Event'}) == (set(), set(), [], set())
+
+
+def test_find_resource_ids(handler):
+    elements = {
+        'instancesSet': {'items': [{'instanceId': INSTANCE_ID}, {'instanceId': 'i-1'}]},
+        'volumeId': 'vol-0123',
+        'resourceId': None,
+        'description': 'vol-not-an-id-key'
+    }
+
+    assert list(handler.find_resource_ids(elements)) == [INSTANCE_ID, 'i-1', 'vol-0123']
+
+
+def test_group_by_type(handler):
+    groups = handler.group_by_type({INSTANCE_ID, 'vol-0123', 'snap-0123', 'eipalloc-0123', 'eni-0123'})
+
+    assert groups == {
+        'instance': {INSTANCE_ID},
+        'volume': {'vol-0123'},
+        'snapshot': {'snap-0123'},
+        'address': {'eipalloc-0123'}
+    }
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from policy import PolicyError, compile_policies, compile_policy, merge_policies
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+DEFAULTS = {
+    'instance': {
+        'state': ['running'],
+        'metrics': {'CPUUtilization': {'below': 5, 'days': 7}}
+    },
+    'volume': {
+        'state': ['available'],
+        'min_age_days': 30
+    },
+    'snapshot': {
+        'min_age_days': 90,
+        'exclude_tags': {'keep': []}
+    },
+    'address': {
+        'associated': False
+    }
+}
+
+
+def volume(state='available', age_days=60, tags=()):
+    return {
+        'VolumeId': 'vol-1',
+        'State': state,
+        'Size': 10,
+        'VolumeType': 'gp3',
+        'CreateTime': NOW - timedelta(days=age_days),
+        'Tags': [{'Key': key, 'Value': value} for key, value in tags]
+    }
+
+
+def test_pushdown_and_residual():
+    policy = compile_policy('volume', {'state': ['available'], 'min_age_days': 30, 'exclude_tags': {'Keep': []}}, NOW)
+
+    assert policy.filters == [{'Name': 'status', 'Values': ['available']}]
+    assert policy.matches(volume())
+    assert not policy.matches(volume(state='in-use'))
+    # State was pushed down, so live results only check the rest
+    assert policy.residual(volume(state='in-use'))
+    assert not policy.residual(volume(age_days=10))
+    assert not policy.residual(volume(tags=[('KEEP', 'yes')]))
+
+
+@pytest.mark.parametrize('resource_type, override', [
+    ('instance', {'metrics': {}}),
+    ('instance', {'metrics': None}),
+    ('instance', {'state': None}),
+    ('volume', {'state': None}),
+    ('address', {'associated': None})
+])
+def test_overrides_cannot_drop_conditions(resource_type, override):
+    merged = merge_policies(DEFAULTS, {resource_type: override})
+
+    assert merged[resource_type] == DEFAULTS[resource_type]
+
+
+def test_overrides_are_anded_with_defaults():
+    merged = merge_policies(DEFAULTS, {
+        'instance': {
+            'state': ['running', 'stopped'],
+            'metrics': {'CPUUtilization': {'below': 50, 'days': 14}, 'NetworkIn': {'below': 1000}}
+        },
+        'volume': {'min_age_days': 7, 'types': ['gp2']},
+        'snapshot': {'exclude_tags': {'keep': ['no'], 'Backup': []}}
+    })
+
+    assert merged['instance']['state'] == ['running']
+    assert merged['instance']['metrics'] == {
+        'CPUUtilization': {'below': 5, 'days': 14},
+        'NetworkIn': {'below': 1000}
+    }
+    assert merged['volume']['min_age_days'] == 30
+    assert merged['volume']['types'] == ['gp2']
+    assert merged['snapshot']['exclude_tags'] == {'keep': [], 'Backup': []}
+    # Defaults are left untouched
+    assert DEFAULTS['instance']['metrics'] == {'CPUUtilization': {'below': 5, 'days': 7}}
+
+    compile_policies(merged, NOW)
+
+
+@pytest.mark.parametrize('resource_type, override', [
+    ('address', {'associated': True}),
+    ('volume', {'state': ['in-use']}),
+    ('volume', {'state': []})
+])
+def test_widening_overrides_are_rejected(resource_type, override):
+    with pytest.raises(PolicyError):
+        merge_policies(DEFAULTS, {resource_type: override})
+
+
+@pytest.mark.parametrize('override', [
+    {'volume': {'min_age_days': '30'}},
+    {'volume': {'min_age_days': True}},
+    {'volume': {'state': 'available'}},
+    {'volume': {'exclude_tags': ['keep']}},
+    {'volume': {'min_age': 3}},
+    {'instance': {'metrics': {'CPUUtilization': {'below': '5'}}}},
+    {'instance': {'metrics': {'CPUUtilization': {'days': 7}}}},
+    {'address': {'associated': 'false'}},
+    {'volume': []},
+    {'database': {}}
+])
+def test_invalid_overrides_raise_policy_error(override):
+    with pytest.raises(PolicyError):
+        compile_policies(merge_policies(DEFAULTS, override), NOW)
+
+
+def test_metrics_only_for_instances():
+    with pytest.raises(PolicyError):
+        compile_policy('volume', {'metrics': {'VolumeIdleTime': {'above': 1}}}, NOW)
@@ -0,0 +1,190 @@
+import gzip
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+boto3 = pytest.importorskip('boto3')
+from botocore.exceptions import ClientError  # noqa: E402
+from botocore.response import StreamingBody  # noqa: E402
+from botocore.stub import Stubber  # noqa: E402
+
+from replay import Cassette, ReplayMissError, request_key  # noqa: E402
+
+ACCOUNT_ID = '123456789012'
+STARTED = datetime(2026, 1, 1, 8, 30, tzinfo=timezone.utc)
+
+
+def make_client(service='ec2'):
+    return boto3.client(service, region_name='us-east-1',
+                        aws_access_key_id='testing', aws_secret_access_key='testing')
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cassette.jsonl.gz')
+
+
+def record(path, service, calls):
+    """
+    Record stubbed calls: a list of (operation, response or error code,
+    params), where params are passed to the call
+    """
+    client = make_client(service)
+    cassette = Cassette('record', path)
+    cassette.attach(client)
+    results = []
+
+    with Stubber(client) as stubber:
+        for operation, response, params in calls:
+            if isinstance(response, str):
+                stubber.add_client_error(operation, response, http_status_code=400)
+            else:
+                stubber.add_response(operation, response, params)
+        for operation, _, params in calls:
+            try:
+                results.append(getattr(client, operation)(**params))
+            except ClientError as e:
+                results.append(e)
+
+    cassette.save()
+    return results
+
+
+def replay(path, service='ec2'):
+    client = make_client(service)
+    cassette = Cassette('replay', path, latency_scale=0)
+    cassette.attach(client)
+    return client, cassette
+
+
+def read_cassette(path):
+    with gzip.open(path, 'rb') as source:
+        return [json.loads(line) for line in source]
+
+
+def test_record_replay_round_trip(path):
+    snapshot = {'SnapshotId': 'snap-1', 'OwnerId': ACCOUNT_ID, 'StartTime': STARTED, 'VolumeSize': 8}
+    record(path, 'ec2', [
+        ('describe_snapshots', {'Snapshots': [snapshot]}, {'OwnerIds': ['self']}),
+        ('delete_snapshot', 'InvalidSnapshot.NotFound', {'SnapshotId': 'snap-1'})
+    ])
+
+    assert ACCOUNT_ID not in gzip.open(path, 'rt').read()
+
+    client, cassette = replay(path)
+    snapshots = client.describe_snapshots(OwnerIds=['self'])['Snapshots']
+    with pytest.raises(ClientError) as error:
+        client.delete_snapshot(SnapshotId='snap-1')
+
+    assert snapshots == [dict(snapshot, OwnerId='000000000001')]
+    assert snapshots[0]['StartTime'] == STARTED
+    assert error.value.response['Error']['Code'] == 'InvalidSnapshot.NotFound'
+    assert error.value.response['ResponseMetadata']['HTTPStatusCode'] == 400
+    assert cassette.summary() == {'recorded': 2, 'served': 2, 'unused': 0, 'misses': 0}
+
+
+def test_request_key_ignores_timestamps_and_accounts():
+    now = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    params = {
+        'StartTime': now,
+        'EndTime': now + timedelta(days=7),
+        'TimePeriod': {'Start': '2026-09-01', 'End': '2026-10-01'},
+        'TopicArn': f'arn:aws:sns:us-east-1:{ACCOUNT_ID}:alerts'
+    }
+    later = {
+        'StartTime': now + timedelta(days=30),
+        'EndTime': now + timedelta(days=37),
+        'TimePeriod': {'Start': '2026-10-01', 'End': '2026-11-01'},
+        'TopicArn': 'arn:aws:sns:us-east-1:000000000001:alerts'
+    }
+
+    assert request_key('sns', 'Publish', params) == request_key('sns', 'Publish', later)
+    assert request_key('sns', 'Publish', params) != request_key('sns', 'Subscribe', params)
+    assert request_key('sns', 'Publish', params) != request_key('sns', 'Publish', dict(params, Message='x'))
+
+
+def test_replay_matches_by_request_first(path):
+    record(path, 'ec2', [
+        ('describe_volumes', {'Volumes': [{'VolumeId': 'vol-a'}]}, {'VolumeIds': ['vol-a']}),
+        ('describe_volumes', {'Volumes': [{'VolumeId': 'vol-b'}]}, {'VolumeIds': ['vol-b']})
+    ])
+
+    client, _ = replay(path)
+
+    assert client.describe_volumes(VolumeIds=['vol-b'])['Volumes'] == [{'VolumeId': 'vol-b'}]
+    assert client.describe_volumes(VolumeIds=['vol-a'])['Volumes'] == [{'VolumeId': 'vol-a'}]
+
+
+def test_replay_falls_back_to_operation_order(path):
+    record(path, 'ec2', [
+        ('describe_volumes', {'Volumes': [{'VolumeId': 'vol-a'}]}, {'VolumeIds': ['vol-a']}),
+        ('describe_volumes', {'Volumes': [{'VolumeId': 'vol-b'}]}, {'VolumeIds': ['vol-b']})
+    ])
+
+    client, cassette = replay(path)
+    filters = [{'Name': 'status', 'Values': ['available']}]
+
+    assert client.describe_volumes(Filters=filters)['Volumes'] == [{'VolumeId': 'vol-a'}]
+    assert client.describe_volumes(VolumeIds=['vol-b'])['Volumes'] == [{'VolumeId': 'vol-b'}]
+    # Each recorded response is served once
+    with pytest.raises(ReplayMissError):
+        client.describe_volumes(Filters=filters)
+    assert cassette.summary() == {'recorded': 2, 'served': 2, 'unused': 0, 'misses': 1}
+
+
+def test_unrecorded_call_raises_miss(path):
+    record(path, 'ec2', [
+        ('describe_addresses', {'Addresses': []}, {})
+    ])
+
+    client, cassette = replay(path)
+
+    with pytest.raises(ReplayMissError):
+        client.describe_snapshots(OwnerIds=['self'])
+    assert cassette.summary() == {'recorded': 1, 'served': 0, 'unused': 1, 'misses': 1}
+
+
+def test_streaming_body_is_captured_and_rewrapped(path):
+    data = b'{"volume": {"state": ["available"]}}'
+    results = record(path, 's3', [
+        ('get_object', {'Body': StreamingBody(io.BytesIO(data), len(data))}, {'Bucket': 'reports', 'Key': 'policy.json'})
+    ])
+
+    # The recording caller still gets the whole stream
+    assert results[0]['Body'].read() == data
+
+    client, _ = replay(path, 's3')
+    body = client.get_object(Bucket='reports', Key='policy.json')['Body']
+
+    assert isinstance(body, StreamingBody)
+    assert body.read() == data
+
+
+def test_environment_excludes_credentials(path, monkeypatch):
+    monkeypatch.setenv('AWS_LAMBDA_FUNCTION_NAME', 'cost-optimizer-resource-cleanup')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'AKIAEXAMPLE')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'secret')
+    monkeypatch.setenv('AWS_SESSION_TOKEN', 'token')
+    monkeypatch.setenv('CASSETTE_PATH', path)
+    monkeypatch.setenv('DRY_RUN', 'true')
+    monkeypatch.setenv('SNS_TOPIC_ARN', f'arn:aws:sns:us-east-1:{ACCOUNT_ID}:cost-alerts')
+
+    Cassette('record', path).save()
+    environment = read_cassette(path)[0]['environment']
+
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_SESSION_TOKEN',
+                 'AWS_LAMBDA_FUNCTION_NAME', 'CASSETTE_PATH'):
+        assert name not in environment
+    assert environment['DRY_RUN'] == 'true'
+    assert environment['SNS_TOPIC_ARN'] == 'arn:aws:sns:us-east-1:000000000001:cost-alerts'
+
+
+def test_environment_not_recorded_outside_lambda(path, monkeypatch):
+    monkeypatch.delenv('AWS_LAMBDA_FUNCTION_NAME', raising=False)
+    monkeypatch.setenv('DRY_RUN', 'true')
+
+    Cassette('record', path).save()
+
+    assert read_cassette(path)[0]['environment'] == {}